@@ -0,0 +1,194 @@
+"""Response caches for Claude calls."""
+
+import atexit
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CACHE_DB = Path.home() / ".iris" / "cache.db"
+CACHE_TTL = 24 * 60 * 60  # seconds
+SEMANTIC_DIR = Path.home() / ".iris" / "semcache"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def cache_key(*parts):
+    """Hash the parts of an effective prompt into a cache key."""
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+class ResponseCache:
+    """Exact-match response cache: in memory, backed by SQLite on disk.
+
+    Entries older than ttl seconds are ignored and replaced on the next put.
+    Pass path=None for a memory-only cache.
+    """
+
+    def __init__(self, path=CACHE_DB, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self._memory = {}  # key -> (timestamp, response)
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(str(path), check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS responses "
+                    "(key TEXT PRIMARY KEY, response TEXT, ts REAL)"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning("Response cache on disk unavailable: %s", e)
+                self._db = None
+
+    def get(self, key):
+        """Return the cached response for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT ts, response FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = self._memory[key] = (row[0], row[1])
+        if entry is None or now - entry[0] > self.ttl:
+            return None
+        return entry[1]
+
+    def put(self, key, response):
+        now = time.time()
+        with self._lock:
+            self._memory[key] = (now, response)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, ts) VALUES (?, ?, ?)",
+                    (key, response, now),
+                )
+                self._db.commit()
+
+
+def load_encoder(model_name=EMBEDDING_MODEL):
+    """Load a sentence-transformer and return a text -> unit vector function.
+
+    Raises ImportError if sentence-transformers is not installed.
+    """
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name)
+    return lambda text: model.encode(text, normalize_embeddings=True)
+
+
+class SemanticCache:
+    """Response cache for near-duplicate prompts.
+
+    Each prompt is embedded as a unit vector; a lookup returns the response
+    stored for the most similar earlier prompt if their cosine similarity is
+    at least threshold. Entries expire after ttl seconds and only the newest
+    max_entries are kept. Vectors and responses are saved under path, at most
+    every save_interval seconds and at exit, so the cache survives restarts.
+    Pass path=None for a memory-only cache.
+
+    The vector computed by get is kept so a put of the same prompt after a
+    miss does not embed it again.
+    """
+
+    def __init__(self, encode, threshold=0.92, path=SEMANTIC_DIR, ttl=CACHE_TTL,
+                 max_entries=500, save_interval=60):
+        import numpy as np
+        self._np = np
+        self._encode = encode
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.save_interval = save_interval
+        self.path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+        self._vectors = None  # (n, dim) float32 array
+        self._times = []  # time.time() each entry was stored, oldest first
+        self._responses = []
+        self._last_embedded = (None, None)  # (prompt, vector) from the latest get
+        self._dirty = False
+        self._last_save = time.time()
+        if self.path is not None:
+            self._load()
+            atexit.register(self.save)
+
+    def _load(self):
+        vectors = self.path / "vectors.npy"
+        responses = self.path / "responses.json"
+        if not (vectors.exists() and responses.exists()):
+            return
+        try:
+            self._vectors = self._np.load(vectors)
+            data = json.loads(responses.read_text())
+            self._times, self._responses = data["times"], data["responses"]
+            if not len(self._vectors) == len(self._times) == len(self._responses):
+                raise ValueError("cache files out of step")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Could not load semantic cache: %s", e)
+            self._vectors, self._times, self._responses = None, [], []
+
+    def save(self):
+        """Write the cache to disk if it changed since the last save."""
+        with self._lock:
+            if not self._dirty or self.path is None:
+                return
+            self._dirty = False
+            self._last_save = time.time()
+            try:
+                self.path.mkdir(parents=True, exist_ok=True)
+                self._np.save(self.path / "vectors.npy", self._vectors)
+                (self.path / "responses.json").write_text(
+                    json.dumps({"times": self._times, "responses": self._responses}))
+            except OSError as e:
+                logger.warning("Could not save semantic cache: %s", e)
+
+    def _embed(self, prompt):
+        with self._lock:
+            last_prompt, vector = self._last_embedded
+        if last_prompt != prompt:
+            vector = self._np.asarray(self._encode(prompt), dtype=self._np.float32)
+        return vector
+
+    def get(self, prompt):
+        """Return the response cached for a similar prompt, or None."""
+        vector = self._embed(prompt)
+        with self._lock:
+            self._last_embedded = (prompt, vector)
+            if self._vectors is None or not len(self._vectors):
+                return None
+            scores = self._vectors @ vector
+            best = int(scores.argmax())
+            if scores[best] < self.threshold or time.time() - self._times[best] > self.ttl:
+                return None
+            logger.debug("Semantic cache similarity %.3f", scores[best])
+            return self._responses[best]
+
+    def put(self, prompt, response):
+        vector = self._embed(prompt)
+        now = time.time()
+        with self._lock:
+            # Entries are stored oldest first, so expired and surplus ones
+            # are a prefix.
+            drop = 0
+            while drop < len(self._times) and now - self._times[drop] > self.ttl:
+                drop += 1
+            drop = max(drop, len(self._times) + 1 - self.max_entries)
+            if self._vectors is None or drop >= len(self._times):
+                self._vectors = vector[None, :]
+                self._times, self._responses = [], []
+            else:
+                self._vectors = self._np.vstack([self._vectors[drop:], vector])
+                del self._times[:drop], self._responses[:drop]
+            self._times.append(now)
+            self._responses.append(response)
+            self._dirty = True
+            due = now - self._last_save >= self.save_interval
+        if due:
+            self.save()
@@ -15,31 +15,71 @@ Options:
     --name=<name>           Assistant name [default: Iris]
     --voice=<voice>         macOS TTS voice [default: Moira (Enhanced)]
     --pitch=<pitch>         Voice pitch [default: 50]
+    --tts=<engine>          Speech engine: say, pyttsx3 or avspeech [default: say]
+    --stt=<backend>         Speech recognizer: faster-whisper or whispercpp [default: faster-whisper]
     --visual                Enable visual mode (periodic camera capture)
     --passive               Start in passive mode (listen, respond only when addressed)
     --dictate               Start in dictation mode (transcribe to file, query on wake)
     --no-shutter            Disable camera shutter sound
     --no-camera             Skip camera initialization
     --message=<contacts>    Message mode: respond via iMessage to named contacts (comma-separated)
+    --semantic-cache        Reuse responses to near-duplicate utterances (needs sentence-transformers)
+    --no-cache              Don't reuse cached greetings or function summaries
+    --wake-spotter          Use Vosk to spot the wake word while asleep (needs vosk)
+    --vad                   End phrases with webrtcvad instead of the energy threshold (needs webrtcvad)
 """
 from docopt import docopt
+import atexit
+import importlib.util
 import logging
+import logging.handlers
 import multiprocessing.resource_tracker
 import sys
 import os
+import queue
+from rapidfuzz import process as _rf_process
+from rapidfuzz.distance import OSA as _OSA
 import speech_recognition as sr
+import sqlite3
 import time
 import string
+import termios
 import json
 import threading
+from . import cache
 from . import functions
 from .functions import EnterInactiveMode
 from . import llm
+from . import stt
 from . import voice
 from .ui import VoiceApp
 
 IDLE_CYCLES_BEFORE_INACTIVE = 25  # ~125s of silence with 5s listen timeout
 VISUAL_INTERVAL = 10  # seconds between visual mode captures
+VISUAL_CHANGE_THRESHOLD = 4.0  # mean per-pixel change (0-255) a frame needs to be described again
+PAUSE_THRESHOLD = 1.0  # seconds of silence that end a phrase
+MIC_CHUNK = 4096  # frames per mic read (256ms at 16kHz)
+SILENCE_RATIO = 0.5  # phrases quieter than this fraction of the energy threshold skip Whisper
+MIN_VOICED_FRAMES = 3  # phrases with fewer 30ms frames above the energy threshold skip Whisper
+MESSAGE_POLL_MIN = 0.25  # seconds between chat.db polls without watchdog, right after a message
+MESSAGE_POLL_MAX = 4.0  # ... backing off to this while no messages arrive
+MESSAGE_WATCH_TIMEOUT = 30  # seconds between chat.db polls while watching for changes
+
+_IMAGE_PROMPT = "Read the image at {path} and describe what you see. Be brief and conversational."
+_VISUAL_PROMPT = (
+    "Read the image at {path} and describe what you see. "
+    "Narrate any changes or interesting details briefly."
+)
+
+_PUNCT_TABLE = str.maketrans('', '', string.punctuation)
+# Whisper's usual output for silence or noise, after normalization.
+_JUNK_TRANSCRIPTS = frozenset({
+    "you",
+    "thanks for watching",
+    "thank you for watching",
+    "15 15 15 15 15 15 15",
+    "25 25 25 25 25 25 25",
+})
 
 # Warm up the multiprocessing resource tracker before Textual takes over,
 # avoids a Python 3.13 bug with bad file descriptors.
@@ -51,12 +91,41 @@ logger = logging.getLogger('computer')
 LOG_DIR = os.path.expanduser("~/.iris/logs")
 
 
+class _BatchedFileHandler(logging.FileHandler):
+    """FileHandler that doesn't flush after every record.
+
+    _LogListener flushes it whenever the log queue runs dry, so a burst of
+    records goes out in one write and the file is current whenever Iris is
+    idle.
+    """
+
+    def emit(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class _LogListener(logging.handlers.QueueListener):
+    """QueueListener that flushes its handlers each time the queue empties."""
+
+    def dequeue(self, block):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            for handler in self.handlers:
+                handler.flush()
+            return self.queue.get(block)
+
+
 def parse_args(args):
     parsed_args = docopt(__doc__, args)
     os.makedirs(LOG_DIR, exist_ok=True)
     from datetime import datetime
     log_file = os.path.join(LOG_DIR, datetime.now().strftime("%Y%m%d_%H%M%S.log"))
-    handlers = [logging.FileHandler(log_file)]
+    handlers = [_BatchedFileHandler(log_file)]
     if parsed_args['--debug']:
         level = logging.DEBUG
         handlers.append(logging.StreamHandler())
@@ -65,8 +134,18 @@ def parse_args(args):
         handlers.append(logging.StreamHandler())
     else:
         level = logging.INFO
-    logging.basicConfig(level=level, handlers=handlers,
-                        format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    formatter = logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s")
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    # Loggers only enqueue records; a background listener does the writes,
+    # so logging from the audio and Claude paths never waits on the disk.
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = _LogListener(log_queue, *handlers)
+    listener.start()
+    atexit.register(listener.stop)
+    logging.basicConfig(level=level, handlers=[queue_handler])
     logger.info("Log file: %s", log_file)
     return parsed_args
 
@@ -93,23 +172,94 @@ def _build_follow_up(results):
         path = result.get("path", "") if isinstance(result, dict) else ""
         if path and path.endswith(".png"):
             image_path = path
-        parts.append(f"{name} returned: {json.dumps(result)}")
+        compact = json.dumps(result, separators=(",", ":"), ensure_ascii=False)
+        parts.append(f"{name} returned: {compact}")
     if image_path and len(results) == 1:
-        return (
-            f"Read the image at {image_path} and describe what you see. "
-            "Be brief and conversational."
-        )
+        return _IMAGE_PROMPT.format(path=image_path)
     return "Functions called:\n" + "\n".join(parts) + "\nSummarize the results conversationally."
 
 
-def _generate_with_timer(prompt_text, on_status=None):
-    """Run llm.generate_response with an elapsed-time counter on the status bar."""
+def _summarize_results(results):
+    """Build the reply from the functions' summary templates.
+
+    Returns None if any function has no template or returned an error, in
+    which case Claude should summarize the results instead.
+    """
+    lines = []
+    for name, result in results:
+        template = functions.FUNCTION_REGISTRY.get(name, {}).get("summary")
+        if not template or not isinstance(result, dict) or "error" in result:
+            return None
+        try:
+            lines.append(template.format(**result))
+        except (KeyError, IndexError, ValueError):
+            return None
+    return " ".join(lines)
+
+
+def _follow_up(results, on_status=None, on_sentence=None, **kwargs):
+    """Reply to function results, from templates when possible.
+
+    A templated reply is noted for Claude's session so later turns can refer
+    to the results. Otherwise asks Claude to summarize them; extra keyword
+    arguments are passed to generate_response.
+    """
+    summary = _summarize_results(results)
+    if summary is not None:
+        logger.debug("Templated follow-up: %s", summary)
+        calls = "; ".join(f"{name} returned {json.dumps(result, separators=(',', ':'))}"
+                          for name, result in results)
+        llm.add_note(f"{calls}. The user was told: {json.dumps(summary)}.", cwd=kwargs.get("cwd"))
+        if on_sentence:
+            on_sentence(summary)
+        return summary
+    return _generate_with_timer(_build_follow_up(results), on_status=on_status,
+                                cacheable=_results_cacheable(results),
+                                on_sentence=on_sentence, **kwargs)
+
+
+# Functions that switch listening modes, mapped to the mode they toggle.
+_MODE_TOGGLES = {
+    "mute_microphone": "muted",
+    "unmute_microphone": "muted",
+    "start_passive_mode": "passive",
+    "stop_passive_mode": "passive",
+    "start_dictation": "dictation",
+    "stop_dictation": "dictation",
+}
+
+
+def _mode_status():
+    """Status line for the current listening mode."""
+    if functions.DICTATION_MODE:
+        return f"Dictating ({functions._dictation_line_count} lines)"
+    if functions.PASSIVE_MODE:
+        return "Passive mode (0 lines)"
+    if functions.MUTED:
+        return "Muted (visual mode active)"
+    return "Listening..."
+
+
+def _results_cacheable(results):
+    """True if every result came from a cacheable function without error."""
+    return all(
+        functions.FUNCTION_REGISTRY.get(name, {}).get("cacheable")
+        and not (isinstance(result, dict) and "error" in result)
+        for name, result in results
+    )
+
+
+def _generate_with_timer(prompt_text, on_status=None, **kwargs):
+    """Run llm.generate_response with an elapsed-time counter on the status bar.
+
+    Extra keyword arguments (cacheable, semantic) are passed through.
+    """
     if not on_status:
-        return llm.generate_response(prompt_text)
+        return llm.generate_response(prompt_text, **kwargs)
     result = [None]
 
     def _run():
-        result[0] = llm.generate_response(prompt_text)
+        result[0] = llm.generate_response(prompt_text, **kwargs)
 
     t = threading.Thread(target=_run, daemon=True)
     t.start()
@@ -122,6 +272,41 @@ def _generate_with_timer(prompt_text, on_status=None):
     return result[0]
 
 
+def _frame_thumbnail(path):
+    """Small grayscale copy of a captured image, for cheap change detection."""
+    import cv2
+    image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        return None
+    return cv2.resize(image, (32, 32), interpolation=cv2.INTER_AREA).astype("int16")
+
+
+def _visual_capture(last_capture, on_status=None, on_display=None):
+    """Capture and narrate a camera frame if visual mode is due for one.
+
+    Frames that look the same as the last one described are not sent to
+    Claude. Returns the time of the most recent capture, to pass back in
+    next time.
+    """
+    now = time.time()
+    if not functions.VISUAL_MODE or now - last_capture < VISUAL_INTERVAL:
+        return last_capture
+    result = functions.capture_image()
+    if isinstance(result, dict) and "path" in result:
+        thumb = _frame_thumbnail(result["path"])
+        last = functions._last_visual_frame
+        if (thumb is not None and last is not None
+                and abs(thumb - last).mean() < VISUAL_CHANGE_THRESHOLD):
+            logger.debug("Scene unchanged, skipping visual description")
+            return now
+        functions._last_visual_frame = thumb
+        response = _generate_with_timer(_VISUAL_PROMPT.format(path=result["path"]),
+                                        on_status=on_status, on_sentence=voice.say)
+        if on_display:
+            on_display("[visual]", response)
+    return now
+
+
 def _listen_with_watchdog(r, source, timeout, phrase_limit, on_status=None):
     """Run r.listen() in a thread with a hard watchdog timeout."""
     result = [None]
@@ -129,7 +314,7 @@ def _listen_with_watchdog(r, source, timeout, phrase_limit, on_status=None):
 
     def _listen():
         try:
-            result[0] = r.listen(source, timeout=timeout, phrase_time_limit=phrase_limit)
+            result[0] = stt.listen(r, source, timeout, phrase_limit)
         except Exception as e:
             error[0] = e
 
@@ -146,74 +331,233 @@ def _listen_with_watchdog(r, source, timeout, phrase_limit, on_status=None):
         if on_status:
             on_status(f"Listening... ({remaining}s)")
     if t.is_alive():
+        # Closing the stream makes the blocked read fail, so the listen
+        # thread exits instead of holding the stream forever.
+        try:
+            source.stream.close()
+        except Exception as e:
+            logger.debug("Could not close hung mic stream: %s", e)
         raise OSError(f"Microphone hung (no response in {watchdog}s)")
     if error[0] is not None:
         raise error[0]
     return result[0]
 
 
-def recognize_audio(r, source, on_status=None):
+def _drain_mic(source):
+    """Discard audio the mic buffered while nobody was reading it.
+
+    Anything buffered during playback is Iris's own voice, so it must not
+    become the start of the next phrase.
+    """
+    try:
+        available = source.stream.pyaudio_stream.get_read_available()
+        if available:
+            source.stream.read(available)
+    except (OSError, AttributeError) as e:
+        logger.debug("Could not drain mic buffer: %s", e)
+
+
+def _reopen_mic(source):
+    """Close and reopen the microphone after a failure; True if it reopened."""
+    try:
+        source.__exit__(None, None, None)
+    except Exception as e:
+        logger.debug("Error closing microphone: %s", e)
+    try:
+        source.__enter__()
+    except OSError as e:
+        logger.error("Could not reopen microphone: %s", e)
+        return False
+    logger.info("Reopened microphone")
+    return True
+
+
+def capture_audio(r, source, on_status=None):
+    """Listen for one phrase on the mic.
+
+    Returns the AudioData, "" if nothing usable was heard, or None if the
+    microphone failed.
+    """
     try:
         timeout = 3 if functions.VISUAL_MODE else 5
         phrase_limit = 3 if functions.VISUAL_MODE else 30
         logger.debug("Listening... (energy_threshold=%s)", r.energy_threshold)
         audio_data = _listen_with_watchdog(r, source, timeout, phrase_limit, on_status=on_status)
-        duration = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
-        logger.info("Captured %.1fs of audio (threshold=%s)", duration, r.energy_threshold)
-        if duration < 0.5:
-            logger.debug("Audio too short (%.1fs), skipping recognition", duration)
-            return ""
-        text = r.recognize_whisper(audio_data)
     except sr.WaitTimeoutError:
         logger.debug("Listen timed out waiting for speech")
-        text = ""
+        return ""
     except OSError as e:
         logger.error("Microphone error: %s", e)
         return None
     except Exception as e:
         logger.error("Audio capture failed: %s", e)
         return None
+    duration = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+    logger.info("Captured %.1fs of audio (threshold=%s)", duration, r.energy_threshold)
+    if duration < 0.5:
+        logger.debug("Audio too short (%.1fs), skipping recognition", duration)
+        return ""
+    level = stt.rms(audio_data)
+    if level < r.energy_threshold * SILENCE_RATIO:
+        logger.debug("Audio too quiet (rms=%.0f), skipping recognition", level)
+        return ""
+    voiced = stt.voiced_frames(audio_data, r.energy_threshold)
+    if voiced < MIN_VOICED_FRAMES:
+        logger.debug("Only %d voiced frames, skipping recognition", voiced)
+        return ""
+    return audio_data
+
+
+def transcribe_audio(audio_data):
+    """Transcribe captured audio, returning None if recognition failed.
+
+    Whisper's usual hallucinations for silence come back as "", as if nothing
+    had been heard.
+    """
+    try:
+        text = stt.transcribe(audio_data)
+    except Exception as e:
+        logger.error("Speech recognition failed: %s", e)
+        return None
+    if text.strip().lower().translate(_PUNCT_TABLE) in _JUNK_TRANSCRIPTS:
+        logger.debug("Discarding likely hallucination: %r", text)
+        return ""
     return text
 
 
-def get_input(r=None, source=None, input_queue=None, on_status=None):
-    """Get user input from mic, stdin, or TUI queue."""
+class _AudioPipeline:
+    """Capture and transcription stages running on background threads.
+
+    As in iris-dictation, one thread reads the mic and another runs Whisper,
+    joined by small queues, so the next phrase is being captured while the
+    previous one is transcribed or answered. Phrases captured while Iris was
+    speaking are dropped so she doesn't hear herself. When both queues are
+    full (e.g. during a long visual description) the capture thread blocks
+    and the mic is not read, so only what the audio driver buffers survives.
+
+    While sleeping is set, phrases are first checked with the Vosk wake-word
+    spotter (if loaded) and only phrases containing a wake word reach Whisper.
+    """
+
+    def __init__(self, r, source, on_status=None):
+        self._r = r
+        self._source = source
+        self._on_status = on_status
+        self.sleeping = False
+        self._audio = queue.Queue(maxsize=2)
+        self._text = queue.Queue(maxsize=2)
+        self._waiting = threading.Event()
+        self._stop = threading.Event()
+        for target in (self._capture, self._recognize):
+            threading.Thread(target=target, daemon=True).start()
+
+    def _status(self, text):
+        # Only show the listen countdown while the main loop is waiting on us.
+        if self._on_status and self._waiting.is_set():
+            self._on_status(text)
+
+    def _capture(self):
+        reopened = False
+        read_until = None  # when the mic was last read; None before the first read
+        while not self._stop.is_set():
+            voice.wait()
+            # Only Iris's own voice needs draining. Audio buffered while this
+            # thread was blocked on a full queue is the user talking.
+            if read_until is None or voice.player.active_since(read_until):
+                _drain_mic(self._source)
+            started = time.monotonic()
+            audio_data = capture_audio(self._r, self._source, on_status=self._status)
+            read_until = time.monotonic()
+            # Reopen the mic once after a failure; give up if it fails again
+            # before a capture succeeds.
+            if audio_data is None and not reopened and _reopen_mic(self._source):
+                reopened = True
+                continue
+            if audio_data is not None:
+                reopened = False
+            if isinstance(audio_data, sr.AudioData) and voice.player.active_since(started):
+                logger.debug("Dropping audio captured during playback")
+                audio_data = ""
+            self._audio.put(audio_data)
+            if audio_data is None:
+                return
+
+    def _recognize(self):
+        while True:
+            audio_data = self._audio.get()
+            text = audio_data
+            if isinstance(audio_data, sr.AudioData):
+                heard = None
+                if self.sleeping:
+                    heard = stt.spot_words(audio_data, _wake_words())
+                if heard is not None:
+                    logger.debug("Wake spotter heard: %r", heard)
+                    text = heard
+                else:
+                    text = transcribe_audio(audio_data)
+            self._text.put(text)
+            if text is None:
+                return
+
+    def get(self):
+        """Return the next transcript ("" for silence, None on mic failure)."""
+        self._waiting.set()
+        try:
+            return self._text.get()
+        finally:
+            self._waiting.clear()
+
+    def stop(self):
+        self._stop.set()
+
+
+def get_input(input_queue=None, pipeline=None):
+    """Get user input from the TUI queue, the mic pipeline, or stdin."""
     if input_queue is not None:
-        return input_queue.get()
-    if r is None:
+        if not functions.VISUAL_MODE:
+            return input_queue.get()
+        # Don't block past the next visual capture while waiting for typing
         try:
-            return input("> ")
-        except (EOFError, KeyboardInterrupt):
-            return None
-    return recognize_audio(r, source, on_status=on_status)
-
-
-def _edit_distance(a, b):
-    """Damerau-Levenshtein distance (transpositions count as 1 edit)."""
-    len_a, len_b = len(a), len(b)
-    d = [[0] * (len_b + 1) for _ in range(len_a + 1)]
-    for i in range(len_a + 1):
-        d[i][0] = i
-    for j in range(len_b + 1):
-        d[0][j] = j
-    for i in range(1, len_a + 1):
-        for j in range(1, len_b + 1):
-            cost = 0 if a[i - 1] == b[j - 1] else 1
-            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + cost)
-            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
-                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
-    return d[len_a][len_b]
+            return input_queue.get(timeout=VISUAL_INTERVAL)
+        except queue.Empty:
+            return ""
+    if pipeline is not None:
+        return pipeline.get()
+    try:
+        return input("> ")
+    except (EOFError, KeyboardInterrupt):
+        return None
+
+
+_wake_name = (None, None)  # (llm.ASSISTANT_NAME, its lowercase form)
+
+
+def _assistant_name():
+    """Lowercased assistant name, recomputed only when the name changes."""
+    global _wake_name
+    if _wake_name[0] != llm.ASSISTANT_NAME:
+        _wake_name = (llm.ASSISTANT_NAME, llm.ASSISTANT_NAME.lower())
+    return _wake_name[1]
+
+
+def _wake_words():
+    """Words that is_wake_word() accepts on their own or together."""
+    return [_assistant_name(), "wake", "up"]
 
 
 def is_wake_word(text):
     """Check if text contains a wake word to exit inactive mode."""
-    name = llm.ASSISTANT_NAME.lower()
-    words = text.lower().split()
-    if any(_edit_distance(w, name) <= 1 for w in words):
-        return True
-    if "wake" in words and "up" in words:
+    name = _assistant_name()
+    all_words = text.lower().split()
+    # A word whose length differs by more than one can't be one edit away
+    words = [w for w in all_words if abs(len(w) - len(name)) <= 1]
+    # One C call over all the words instead of one per word. OSA distance
+    # counts a transposition as one edit.
+    if words and _rf_process.extractOne(name, words, scorer=_OSA.distance,
+                                        score_cutoff=1) is not None:
         return True
-    return False
+    word_set = set(all_words)
+    return "wake" in word_set and "up" in word_set
 
 
 def audio_loop(prompt=None, on_display=None, on_status=None, on_sleep=None,
@@ -223,34 +567,35 @@ def audio_loop(prompt=None, on_display=None, on_status=None, on_sleep=None,
     mic = None
     source = None
     r = None
+    pipeline = None
 
     if quiet:
         voice.QUIET = True
     else:
         r = sr.Recognizer()
-        r.pause_threshold = 1.5
+        r.pause_threshold = PAUSE_THRESHOLD
         r.dynamic_energy_threshold = False
         r.energy_threshold = 300
         try:
-            import pyaudio
-            _pa = pyaudio.PyAudio()
-            default_idx = _pa.get_default_input_device_info()["index"]
-            default_name = _pa.get_default_input_device_info()["name"]
-            logger.info("Default input device: [%d] %s", default_idx, default_name)
-            for i in range(_pa.get_device_count()):
-                info = _pa.get_device_info_by_index(i)
-                if info["maxInputChannels"] > 0:
-                    logger.info("  Input device [%d]: %s (channels=%d, rate=%.0f)",
-                                i, info["name"], info["maxInputChannels"], info["defaultSampleRate"])
-            _pa.terminate()
-            mic = sr.Microphone(sample_rate=16000)
-            _idx = mic.device_index if mic.device_index is not None else default_idx
-            mic_name = sr.Microphone.list_microphone_names()[_idx]
-            logger.info("Using microphone: [%d] %s", _idx, mic_name)
-            print(f"Microphone: {mic_name}")
+            mic = sr.Microphone(sample_rate=16000, chunk_size=MIC_CHUNK)
             source = mic.__enter__()
             if source.stream is None:
                 raise OSError("Microphone stream failed to open")
+            # Reuse the PyAudio instance the Microphone opened
+            pa = source.audio
+            if logger.isEnabledFor(logging.DEBUG):
+                for i in range(pa.get_device_count()):
+                    info = pa.get_device_info_by_index(i)
+                    if info["maxInputChannels"] > 0:
+                        logger.debug("  Input device [%d]: %s (channels=%d, rate=%.0f)",
+                                     i, info["name"], info["maxInputChannels"], info["defaultSampleRate"])
+            if mic.device_index is None:
+                info = pa.get_default_input_device_info()
+            else:
+                info = pa.get_device_info_by_index(mic.device_index)
+            mic_name = info["name"]
+            logger.info("Using microphone: [%d] %s", info["index"], mic_name)
+            print(f"Microphone: {mic_name}")
         except OSError as e:
             logger.error("Could not open microphone: %s", e)
             print("Error: Could not open microphone. Check that a microphone is "
@@ -259,6 +604,8 @@ def audio_loop(prompt=None, on_display=None, on_status=None, on_sleep=None,
                 on_exit()
             return
 
+        # Calibrate and load Whisper in the background while the camera and
+        # Claude start up; the greeting waits for calibration to finish.
         logger.info("Calibrating microphone...")
         if on_status:
             on_status("Calibrating microphone...")
@@ -271,24 +618,39 @@ def audio_loop(prompt=None, on_display=None, on_status=None, on_sleep=None,
             calibrated.set()
         t = threading.Thread(target=_calibrate, daemon=True)
         t.start()
-        if not calibrated.wait(timeout=5):
-            logger.warning("Calibration timed out, using default threshold")
-            r.energy_threshold = 300
-        logger.info("Calibrated energy threshold: %s", r.energy_threshold)
-        r.energy_threshold = max(r.energy_threshold, 100)
-        logger.info("Energy threshold set to %s", r.energy_threshold)
+        threading.Thread(target=stt.load_model, daemon=True).start()
+        calibration_deadline = time.monotonic() + 5
 
     try:
+        # Start Claude in the background; the camera stays on this thread.
+        logger.info("Initializing Claude...")
+        greeting = [None]
+
+        def _init_claude():
+            greeting[0] = llm.init_conversation()
+
+        claude_thread = threading.Thread(target=_init_claude, daemon=True)
+        claude_thread.start()
+
         if not no_camera:
             logger.info("Warming up camera...")
             if on_status:
                 on_status("Warming up camera...")
             functions.init_camera()
 
-        logger.info("Initializing Claude...")
         if on_status:
             on_status("Initializing Claude...")
-        response = llm.init_conversation()
+        claude_thread.join()
+        response = greeting[0]
+
+        if r is not None:
+            if not calibrated.wait(timeout=max(calibration_deadline - time.monotonic(), 0)):
+                logger.warning("Calibration timed out, using default threshold")
+                r.energy_threshold = 300
+            logger.info("Calibrated energy threshold: %s", r.energy_threshold)
+            r.energy_threshold = max(r.energy_threshold, 100)
+            logger.info("Energy threshold set to %s", r.energy_threshold)
+
         if on_display:
             on_display("", response)
         voice.say(response)
@@ -296,11 +658,12 @@ def audio_loop(prompt=None, on_display=None, on_status=None, on_sleep=None,
         if intro:
             if on_status:
                 on_status("Processing intro...")
-            response = _generate_with_timer(intro, on_status=on_status)
-            speech, _ = llm.parse_response(response)
+            response = _generate_with_timer(intro, on_status=on_status, on_sentence=voice.say)
             if on_display:
                 on_display(intro, response)
-            voice.say(speech)
+
+        if r is not None:
+            pipeline = _AudioPipeline(r, source, on_status=on_status)
 
         active = True
         idle_count = 0
@@ -316,8 +679,10 @@ def audio_loop(prompt=None, on_display=None, on_status=None, on_sleep=None,
         else:
             print("Ready")
         while True:
+            if pipeline is not None:
+                pipeline.sleeping = not active
             try:
-                text = get_input(r, source, input_queue, on_status=on_status)
+                text = get_input(input_queue, pipeline=pipeline)
             except KeyboardInterrupt:
                 if on_exit:
                     on_exit()
@@ -327,27 +692,14 @@ def audio_loop(prompt=None, on_display=None, on_status=None, on_sleep=None,
                     on_exit()
                 return
 
-            text = text.strip().lower()
-            text = text.translate(str.maketrans('', '', string.punctuation))
+            if text:
+                text = text.strip().lower().translate(_PUNCT_TABLE)
 
             # Muted: discard all audio unless it contains "unmute"
             if functions.MUTED and r is not None and not quiet:
                 if not (text and "unmute" in text.split()):
                     idle_count = 0
-                    now = time.time()
-                    if functions.VISUAL_MODE and now - last_visual_capture >= VISUAL_INTERVAL:
-                        last_visual_capture = now
-                        result = functions.capture_image()
-                        if isinstance(result, dict) and "path" in result:
-                            prompt_text = (
-                                f"Read the image at {result['path']} and describe what you see. "
-                                "Narrate any changes or interesting details briefly."
-                            )
-                            response = _generate_with_timer(prompt_text, on_status=on_status)
-                            speech, _ = llm.parse_response(response)
-                            if on_display:
-                                on_display("[visual]", response)
-                            voice.say(speech)
+                    last_visual_capture = _visual_capture(last_visual_capture, on_status, on_display)
                     continue
 
             # Passive mode: buffer speech, only send to Claude on wake word
@@ -358,7 +710,7 @@ def audio_loop(prompt=None, on_display=None, on_status=None, on_sleep=None,
                         on_status(f"Passive mode ({len(passive_buffer)} lines)")
                 if text and is_wake_word(text):
                     # Addressed by name — send buffer as context
-                    context = "\n".join(passive_buffer)
+                    context = "\n".join(functions._collapse_repeats(passive_buffer))
                     passive_buffer.clear()
                     prompt_text = (
                         f"You have been in passive mode, listening to a conversation. "
@@ -367,17 +719,15 @@ def audio_loop(prompt=None, on_display=None, on_status=None, on_sleep=None,
                     )
                     if on_status:
                         on_status("Processing...")
-                    response = _generate_with_timer(prompt_text, on_status=on_status)
-                    speech, json_list = llm.parse_response(response)
+                    response = _generate_with_timer(prompt_text, on_status=on_status,
+                                                    on_sentence=voice.say)
+                    _, json_list = llm.parse_response(response)
                     if on_display:
                         on_display(f"[conversation] {text}", response)
                     # Handle function calls same as active mode
                     if json_list:
-                        voice.say(speech)
                         results = _execute_functions(json_list)
-                        follow_up_prompt = _build_follow_up(results)
-                        follow_up = _generate_with_timer(follow_up_prompt, on_status=on_status)
-                        speech, _ = llm.parse_response(follow_up)
+                        follow_up = _follow_up(results, on_status=on_status, on_sentence=voice.say)
                         if on_display:
                             on_display(text, follow_up)
                         # Clear buffer and update status after toggling passive mode off
@@ -386,33 +736,18 @@ def audio_loop(prompt=None, on_display=None, on_status=None, on_sleep=None,
                             passive_buffer.clear()
                             if on_status:
                                 on_status("Listening...")
-                            voice.say(speech)
                             continue
-                    voice.say(speech)
                     if on_status:
                         on_status(f"Passive mode (0 lines)")
                 else:
                     # No wake word — keep visual captures firing if enabled
-                    now = time.time()
-                    if functions.VISUAL_MODE and now - last_visual_capture >= VISUAL_INTERVAL:
-                        last_visual_capture = now
-                        result = functions.capture_image()
-                        if isinstance(result, dict) and "path" in result:
-                            prompt_text = (
-                                f"Read the image at {result['path']} and describe what you see. "
-                                "Narrate any changes or interesting details briefly."
-                            )
-                            response = _generate_with_timer(prompt_text, on_status=on_status)
-                            speech, _ = llm.parse_response(response)
-                            if on_display:
-                                on_display("[visual]", response)
-                            voice.say(speech)
+                    last_visual_capture = _visual_capture(last_visual_capture, on_status, on_display)
                 idle_count = 0  # suppress auto-sleep
                 continue
 
             # Dictation mode: transcribe to disk, send to Claude on wake word
             if functions.DICTATION_MODE and active and r is not None and not quiet:
-                if text and text not in ("15 15 15 15 15 15 15", "25 25 25 25 25 25 25"):
+                if text:
                     functions.append_dictation(text)
                     if on_status:
                         on_status(f"Dictating ({functions._dictation_line_count} lines)")
@@ -427,63 +762,36 @@ def audio_loop(prompt=None, on_display=None, on_status=None, on_sleep=None,
                     )
                     if on_status:
                         on_status("Processing...")
-                    response = _generate_with_timer(prompt_text, on_status=on_status)
-                    speech, json_list = llm.parse_response(response)
+                    response = _generate_with_timer(prompt_text, on_status=on_status,
+                                                    on_sentence=voice.say)
+                    _, json_list = llm.parse_response(response)
                     if on_display:
                         on_display(f"[dictation] {text}", response)
                     if json_list:
-                        voice.say(speech)
                         results = _execute_functions(json_list)
-                        follow_up_prompt = _build_follow_up(results)
-                        follow_up = _generate_with_timer(follow_up_prompt, on_status=on_status)
-                        speech, _ = llm.parse_response(follow_up)
+                        follow_up = _follow_up(results, on_status=on_status, on_sentence=voice.say)
                         if on_display:
                             on_display(text, follow_up)
                         called = {jd["function"] for jd in json_list}
                         if "stop_dictation" in called:
-                            voice.say(speech)
                             if on_status:
                                 on_status("Listening...")
                             continue
-                    voice.say(speech)
                     if on_status:
                         on_status(f"Dictating ({functions._dictation_line_count} lines)")
                 else:
-                    now = time.time()
-                    if functions.VISUAL_MODE and now - last_visual_capture >= VISUAL_INTERVAL:
-                        last_visual_capture = now
-                        result = functions.capture_image()
-                        if isinstance(result, dict) and "path" in result:
-                            prompt_text = (
-                                f"Read the image at {result['path']} and describe what you see. "
-                                "Narrate any changes or interesting details briefly."
-                            )
-                            response = _generate_with_timer(prompt_text, on_status=on_status)
-                            speech, _ = llm.parse_response(response)
-                            if on_display:
-                                on_display("[visual]", response)
-                            voice.say(speech)
+                    last_visual_capture = _visual_capture(last_visual_capture, on_status, on_display)
                 idle_count = 0  # suppress auto-sleep
                 continue
 
-            if text == "" or text in ("15 15 15 15 15 15 15", "25 25 25 25 25 25 25"):
-                if active and not quiet and r is not None:
+            if not text:
+                if active and functions.VISUAL_MODE and input_queue is not None:
+                    # TUI text input times out on the visual interval
+                    last_visual_capture = _visual_capture(last_visual_capture, on_status, on_display)
+                elif active and not quiet and r is not None:
                     if functions.VISUAL_MODE:
                         idle_count = 0
-                        now = time.time()
-                        if now - last_visual_capture >= VISUAL_INTERVAL:
-                            last_visual_capture = now
-                            result = functions.capture_image()
-                            if isinstance(result, dict) and "path" in result:
-                                prompt_text = (
-                                    f"Read the image at {result['path']} and describe what you see. "
-                                    "Narrate any changes or interesting details briefly."
-                                )
-                                response = _generate_with_timer(prompt_text, on_status=on_status)
-                                speech, _ = llm.parse_response(response)
-                                if on_display:
-                                    on_display("[visual]", response)
-                                voice.say(speech)
+                        last_visual_capture = _visual_capture(last_visual_capture, on_status, on_display)
                     else:
                         idle_count += 1
                         logger.debug("Idle cycle %d/%d", idle_count, IDLE_CYCLES_BEFORE_INACTIVE)
@@ -531,7 +839,8 @@ def audio_loop(prompt=None, on_display=None, on_status=None, on_sleep=None,
             try:
                 if prompt:
                     text = prompt + " " + text
-                response = _generate_with_timer(text, on_status=on_status)
+                response = _generate_with_timer(text, on_status=on_status, semantic=True,
+                                                on_sentence=voice.say)
                 speech, json_list = llm.parse_response(response)
                 logger.info("Iris: %s", speech)
                 if on_display:
@@ -542,43 +851,23 @@ def audio_loop(prompt=None, on_display=None, on_status=None, on_sleep=None,
 
                 # If Claude called functions, speak initial text, then execute all
                 if json_list:
-                    voice.say(speech)
                     results = _execute_functions(json_list)
                     for name, result in results:
                         print(json.dumps(result, indent=2))
-                    follow_up_prompt = _build_follow_up(results)
-                    follow_up = _generate_with_timer(follow_up_prompt, on_status=on_status)
-                    speech, _ = llm.parse_response(follow_up)
+                    follow_up = _follow_up(results, on_status=on_status, on_sentence=voice.say)
                     if on_display:
                         on_display(text, follow_up)
 
-                    # Update UI based on which functions were called
-                    called = {jd["function"] for jd in json_list}
-                    if called & {"mute_microphone", "unmute_microphone"}:
-                        if on_mute:
+                    # Update UI based on which modes the called functions toggled
+                    toggled = {_MODE_TOGGLES[jd["function"]] for jd in json_list
+                               if jd["function"] in _MODE_TOGGLES}
+                    if toggled:
+                        if "muted" in toggled and on_mute:
                             on_mute(functions.MUTED)
-                        if on_status:
-                            on_status("Muted (visual mode active)" if functions.MUTED else "Listening...")
-
-                    if called & {"start_passive_mode", "stop_passive_mode"}:
-                        if not functions.PASSIVE_MODE:
-                            passive_buffer.clear()
-                        if on_status:
-                            if functions.PASSIVE_MODE:
-                                on_status("Passive mode (0 lines)")
-                            else:
-                                on_status("Listening...")
-
-                    if called & {"start_dictation", "stop_dictation"}:
-                        if functions.DICTATION_MODE:
+                        if toggled & {"passive", "dictation"}:
                             passive_buffer.clear()
                         if on_status:
-                            if functions.DICTATION_MODE:
-                                on_status(f"Dictating ({functions._dictation_line_count} lines)")
-                            else:
-                                on_status("Listening...")
-
-                voice.say(speech)
+                            on_status(_mode_status())
             except EnterInactiveMode:
                 logger.info("Function requested inactive mode")
                 functions.release_camera()
@@ -594,16 +883,16 @@ def audio_loop(prompt=None, on_display=None, on_status=None, on_sleep=None,
                     print("Sleeping")
                 continue
             except SystemExit:
-                voice.say(speech)
+                voice.wait()
                 if on_exit:
                     on_exit()
                 return
 
             if on_status:
                 on_status("Waiting for input..." if quiet else "Listening...")
-            if not quiet:
-                time.sleep(1)
     finally:
+        if pipeline is not None:
+            pipeline.stop()
         if functions.DICTATION_MODE:
             functions.stop_dictation()
         functions.release_camera()
@@ -611,44 +900,74 @@ def audio_loop(prompt=None, on_display=None, on_status=None, on_sleep=None,
             mic.__exit__(None, None, None)
 
 
-def _poll_new_messages(handles, last_rowid):
+def _open_chat_db():
+    """Open chat.db read-only; the connection is reused for every poll."""
+    conn = sqlite3.connect(f"file:{functions._CHAT_DB}?mode=ro", uri=True)
+    conn.execute("PRAGMA query_only = 1")
+    return conn
+
+
+def _watch_chat_db(changed):
+    """Set the changed event whenever chat.db or its WAL is written.
+
+    Returns the running watchdog observer (FSEvents on macOS), or None if
+    watchdog is not installed, in which case the caller keeps polling.
+    """
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        logger.info("watchdog not installed, polling chat.db every %g-%gs",
+                    MESSAGE_POLL_MIN, MESSAGE_POLL_MAX)
+        return None
+    names = {functions._CHAT_DB.name, functions._CHAT_DB.name + "-wal"}
+
+    class _Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if os.path.basename(event.src_path) in names:
+                changed.set()
+
+    observer = Observer()
+    observer.daemon = True
+    try:
+        observer.schedule(_Handler(), str(functions._CHAT_DB.parent))
+        observer.start()
+    except OSError as e:
+        logger.warning("Could not watch %s (%s), polling instead", functions._CHAT_DB.parent, e)
+        return None
+    logger.info("Watching %s for new messages", functions._CHAT_DB)
+    return observer
+
+
+def _poll_new_messages(conn, handles, last_rowid):
     """Poll chat.db for new incoming messages from the given handles since last_rowid."""
-    import subprocess as sp
-    handle_list = ",".join(f"'{h}'" for h in handles)
     sql = (
-        f"SELECT message.ROWID, message.text, handle.id as sender "
-        f"FROM message "
-        f"JOIN handle ON message.handle_id = handle.ROWID "
-        f"WHERE message.ROWID > {last_rowid} "
-        f"AND message.is_from_me = 0 "
-        f"AND message.text IS NOT NULL "
-        f"AND handle.id IN ({handle_list}) "
-        f"ORDER BY message.date ASC;"
+        "SELECT message.ROWID, message.text, handle.id "
+        "FROM message "
+        "JOIN handle ON message.handle_id = handle.ROWID "
+        "WHERE message.ROWID > ? "
+        "AND message.is_from_me = 0 "
+        "AND message.text IS NOT NULL "
+        f"AND handle.id IN ({','.join('?' * len(handles))}) "
+        "ORDER BY message.date ASC"
     )
-    chat_db = str(functions._CHAT_DB)
-    result = sp.run(
-        ["sqlite3", "-json", chat_db, sql],
-        capture_output=True, text=True, timeout=10,
-    )
-    if result.returncode != 0 or not result.stdout.strip():
+    try:
+        rows = conn.execute(sql, (last_rowid, *handles)).fetchall()
+    except sqlite3.Error as e:
+        logger.error("Failed to poll chat.db: %s", e)
         return []
-    return json.loads(result.stdout.strip())
+    return [{"ROWID": rowid, "text": text, "sender": sender}
+            for rowid, text, sender in rows]
 
 
-def _get_max_rowid():
+def _get_max_rowid(conn):
     """Get the current maximum message ROWID from chat.db."""
-    import subprocess as sp
-    chat_db = str(functions._CHAT_DB)
-    result = sp.run(
-        ["sqlite3", chat_db, "SELECT MAX(ROWID) FROM message;"],
-        capture_output=True, text=True, timeout=10,
-    )
-    if result.returncode != 0 or not result.stdout.strip():
-        return 0
     try:
-        return int(result.stdout.strip())
-    except ValueError:
+        row = conn.execute("SELECT MAX(ROWID) FROM message").fetchone()
+    except sqlite3.Error as e:
+        logger.error("Failed to read chat.db: %s", e)
         return 0
+    return row[0] or 0
 
 
 def message_loop(contacts_str, prompt=None, intro=None, no_camera=False):
@@ -703,14 +1022,28 @@ def message_loop(contacts_str, prompt=None, intro=None, no_camera=False):
         functions._send_imessage_to_handle(handle, f"Hi, {llm.ASSISTANT_NAME} is online.")
         logger.info("Sent online notification to %s (%s)", name, handle)
 
+    try:
+        chat_db = _open_chat_db()
+    except sqlite3.Error as e:
+        logger.error("Could not open %s: %s", functions._CHAT_DB, e)
+        print(f"Error: Could not open {functions._CHAT_DB}: {e}")
+        return
+
     # Start polling from current max ROWID (only respond to new messages)
-    last_rowid = _get_max_rowid()
+    last_rowid = _get_max_rowid(chat_db)
     logger.info("Starting message poll from ROWID %d", last_rowid)
     print(f"Message mode active. Polling for new messages... (Ctrl-C to quit)")
 
+    changed = threading.Event()
+    observer = _watch_chat_db(changed)
+    interval = MESSAGE_WATCH_TIMEOUT if observer is not None else MESSAGE_POLL_MIN
+
     try:
         while True:
-            new_messages = _poll_new_messages(list(handles.keys()), last_rowid)
+            # Cleared before polling so a message that lands while we reply
+            # triggers another poll straight away.
+            changed.clear()
+            new_messages = _poll_new_messages(chat_db, list(handles.keys()), last_rowid)
 
             for msg in new_messages:
                 rowid = msg["ROWID"]
@@ -750,8 +1083,7 @@ def message_loop(contacts_str, prompt=None, intro=None, no_camera=False):
 
                         for name, result in results:
                             print(f"  [fn] {name} -> {json.dumps(result)}")
-                        follow_up_prompt = _build_follow_up(results)
-                        follow_up = llm.generate_response(follow_up_prompt, cwd=cwd)
+                        follow_up = _follow_up(results, cwd=cwd)
                         speech, _ = llm.parse_response(follow_up)
 
                     if speech:
@@ -767,15 +1099,34 @@ def message_loop(contacts_str, prompt=None, intro=None, no_camera=False):
                     logger.error("Error processing message: %s", e)
                     print(f"  [error] {e}")
 
-            time.sleep(2)
+            if observer is None:
+                # Poll quickly while a conversation is going, back off when idle
+                interval = (MESSAGE_POLL_MIN if new_messages
+                            else min(interval * 1.5, MESSAGE_POLL_MAX))
+            changed.wait(interval)
     except KeyboardInterrupt:
         print("\nMessage mode stopped.")
     finally:
+        if observer is not None:
+            observer.stop()
+        chat_db.close()
         functions._timer_callback = None
         functions._current_sender = None
         functions.release_camera()
 
 
+def _restore_terminal(saved):
+    """Put back the terminal settings saved before the TUI ran and clear the screen."""
+    try:
+        if saved is not None:
+            termios.tcsetattr(sys.stdin.fileno(), termios.TCSADRAIN, saved)
+        # Show the cursor, reset attributes, clear, and home the cursor
+        sys.stdout.write("\x1b[?25h\x1b[0m\x1b[2J\x1b[H")
+        sys.stdout.flush()
+    except (termios.error, OSError, ValueError):
+        os.system("stty sane && clear")
+
+
 def main(args=None):
     if args is None:
         args = sys.argv[1:]
@@ -795,6 +1146,20 @@ def main(args=None):
     quiet = parsed_args['--quiet']
     voice.VOICE = parsed_args['--voice']
     voice.PITCH = int(parsed_args['--pitch'])
+    voice.ENGINE = parsed_args['--tts']
+    if voice.ENGINE not in voice.ENGINES:
+        print(f"Error: unknown --tts engine '{voice.ENGINE}'")
+        return 1
+    if not voice.engine_available(voice.ENGINE):
+        print(f"Warning: --tts={voice.ENGINE} needs {voice.ENGINES[voice.ENGINE]}, using say")
+        voice.ENGINE = "say"
+    stt.BACKEND = parsed_args['--stt']
+    if stt.BACKEND not in ("faster-whisper", "whispercpp"):
+        print(f"Error: unknown --stt backend '{stt.BACKEND}'")
+        return 1
+    if stt.BACKEND == "whispercpp" and importlib.util.find_spec("pywhispercpp") is None:
+        print("Warning: --stt=whispercpp needs pywhispercpp, using faster-whisper")
+        stt.BACKEND = "faster-whisper"
     llm.ASSISTANT_NAME = parsed_args['--name']
     if system:
         llm.EXTRA_SYSTEM_PROMPT = system
@@ -806,6 +1171,23 @@ def main(args=None):
         functions.PASSIVE_MODE = True
     if parsed_args['--dictate']:
         functions.start_dictation()
+    if parsed_args['--no-cache']:
+        llm.RESPONSE_CACHE = False
+    if parsed_args['--semantic-cache']:
+        try:
+            llm.SEMANTIC_CACHE = cache.SemanticCache(cache.load_encoder())
+        except ImportError:
+            print("Warning: --semantic-cache needs sentence-transformers, continuing without it")
+    if parsed_args['--wake-spotter']:
+        try:
+            stt.load_wake_model()
+        except ImportError:
+            print("Warning: --wake-spotter needs vosk, continuing without it")
+    if parsed_args['--vad']:
+        try:
+            stt.enable_vad()
+        except ImportError:
+            print("Warning: --vad needs webrtcvad, continuing without it")
 
     no_camera = parsed_args['--no-camera']
 
@@ -817,6 +1199,9 @@ def main(args=None):
             pass
         return 0
 
+    saved_tty = None
+    if not parsed_args['--debug'] and sys.stdin.isatty():
+        saved_tty = termios.tcgetattr(sys.stdin.fileno())
     try:
         if parsed_args['--debug']:
             audio_loop(prompt, quiet=quiet, intro=intro, no_camera=no_camera)
@@ -838,7 +1223,7 @@ def main(args=None):
         pass
     finally:
         if not parsed_args['--debug']:
-            os.system("stty sane && clear")
+            _restore_terminal(saved_tty)
 
     return 0
 
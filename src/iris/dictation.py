@@ -16,6 +16,7 @@ import speech_recognition as sr
 import time
 from threading import Thread
 from queue import Queue
+from . import stt
 
 logger = logging.getLogger("computer")
 
@@ -30,14 +31,14 @@ IGNORE_STRINGS = ['1.5% 1.5% 1.5% 1.5% 1.5% 1.5% 1.5%',
 
 
 # background recognizer thread
-def recognize_audio_thread(r, queue):
+def recognize_audio_thread(queue):
     while True:
         print('Waiting on audio...', file=sys.stderr)
         audio_data = queue.get()
         try:
             print("Recognizing...", file=sys.stderr)
             start = time.time()
-            text = r.recognize_whisper(audio_data)
+            text = stt.transcribe(audio_data)
             print("Took ", time.time() - start, file=sys.stderr)
         except KeyboardInterrupt:
             return
@@ -85,7 +86,7 @@ def main(args=None):
         print("Ready", file=sys.stderr)
         audio_queue = Queue()
         recognizer_thread = Thread(target=recognize_audio_thread,
-                                   args=(r, audio_queue))
+                                   args=(audio_queue,))
         recognizer_thread.start()
         listen_for_audio(r, source, audio_queue)
 
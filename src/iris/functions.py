@@ -5,6 +5,7 @@ import os
 import platform
 import shutil
 import socket
+import string
 import subprocess
 import threading
 import time
@@ -18,6 +19,7 @@ from . import voice
 logger = logging.getLogger(__name__)
 
 FUNCTION_REGISTRY = {}
+_prompt_description = None  # cached get_prompt_description() result
 
 VISUAL_MODE = False
 MUTED = False
@@ -39,13 +41,23 @@ class EnterInactiveMode(Exception):
     pass
 
 
-def register(name, description, parameters):
-    """Decorator to register a function Claude can call."""
+def register(name, description, parameters, cacheable=False, summary=None):
+    """Decorator to register a function Claude can call.
+
+    Mark a function cacheable when its result depends only on its args, so
+    Claude's summary of that result can be served from the response cache.
+    A summary template (formatted with the result dict's keys) lets simple
+    results be spoken directly, without asking Claude to summarize them.
+    """
     def decorator(fn):
+        global _prompt_description
+        _prompt_description = None
         FUNCTION_REGISTRY[name] = {
             "function": fn,
             "description": description,
             "parameters": parameters,
+            "cacheable": cacheable,
+            "summary": summary,
         }
         return fn
     return decorator
@@ -64,7 +76,13 @@ def call(name, args):
 
 
 def get_prompt_description():
-    """Generate a description of available functions for the system prompt."""
+    """Generate a description of available functions for the system prompt.
+
+    The result is cached until another function is registered.
+    """
+    global _prompt_description
+    if _prompt_description is not None:
+        return _prompt_description
     lines = []
     for name, info in FUNCTION_REGISTRY.items():
         params = ", ".join(
@@ -72,36 +90,54 @@ def get_prompt_description():
             for p in info["parameters"]
         )
         lines.append(f'- {name}({params}): {info["description"]}')
-    return "\n".join(lines)
+    _prompt_description = "\n".join(lines)
+    return _prompt_description
 
 
 # --- Registered functions ---
 
 
+_geo_cache = {}  # lowercased city -> (lat, lon, display name)
+
+# Map WMO weather codes to descriptions
+_WEATHER_CODES = {
+    0: "clear sky", 1: "mainly clear", 2: "partly cloudy", 3: "overcast",
+    45: "foggy", 48: "depositing rime fog",
+    51: "light drizzle", 53: "moderate drizzle", 55: "dense drizzle",
+    61: "slight rain", 63: "moderate rain", 65: "heavy rain",
+    71: "slight snow", 73: "moderate snow", 75: "heavy snow",
+    80: "slight rain showers", 81: "moderate rain showers", 82: "violent rain showers",
+    95: "thunderstorm", 96: "thunderstorm with slight hail", 99: "thunderstorm with heavy hail",
+}
+
+
 @register(
     name="get_weather",
     description="Get the current weather for a location",
     parameters=[
         {"name": "location", "type": "string", "description": "City or location name"},
     ],
+    summary="It's {temperature_c} degrees Celsius and {condition} in {location}.",
 )
 def get_weather(location):
     """Get real weather using Open-Meteo (no API key needed)."""
     try:
         # Geocode the location name to lat/lon (use just the city name)
         city = location.split(",")[0].strip()
-        geo_url = "https://geocoding-api.open-meteo.com/v1/search?" + urllib.parse.urlencode({
-            "name": city, "count": 1
-        })
-        with urllib.request.urlopen(geo_url) as resp:
-            geo = json.loads(resp.read())
+        key = city.lower()
+        if key not in _geo_cache:
+            geo_url = "https://geocoding-api.open-meteo.com/v1/search?" + urllib.parse.urlencode({
+                "name": city, "count": 1
+            })
+            with urllib.request.urlopen(geo_url, timeout=10) as resp:
+                geo = json.loads(resp.read())
 
-        if "results" not in geo or not geo["results"]:
-            return {"error": f"Could not find location: {location}"}
+            if "results" not in geo or not geo["results"]:
+                return {"error": f"Could not find location: {location}"}
 
-        place = geo["results"][0]
-        lat, lon = place["latitude"], place["longitude"]
-        name = place.get("name", location)
+            place = geo["results"][0]
+            _geo_cache[key] = (place["latitude"], place["longitude"], place.get("name", location))
+        lat, lon, name = _geo_cache[key]
 
         # Fetch current weather
         weather_url = "https://api.open-meteo.com/v1/forecast?" + urllib.parse.urlencode({
@@ -110,26 +146,16 @@ def get_weather(location):
             "current": "temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m",
             "temperature_unit": "celsius",
         })
-        with urllib.request.urlopen(weather_url) as resp:
+        with urllib.request.urlopen(weather_url, timeout=10) as resp:
             weather = json.loads(resp.read())
 
         current = weather["current"]
-        # Map WMO weather codes to descriptions
         code = current["weather_code"]
-        conditions = {
-            0: "clear sky", 1: "mainly clear", 2: "partly cloudy", 3: "overcast",
-            45: "foggy", 48: "depositing rime fog",
-            51: "light drizzle", 53: "moderate drizzle", 55: "dense drizzle",
-            61: "slight rain", 63: "moderate rain", 65: "heavy rain",
-            71: "slight snow", 73: "moderate snow", 75: "heavy snow",
-            80: "slight rain showers", 81: "moderate rain showers", 82: "violent rain showers",
-            95: "thunderstorm", 96: "thunderstorm with slight hail", 99: "thunderstorm with heavy hail",
-        }
         return {
             "location": name,
             "temperature_c": current["temperature_2m"],
             "humidity_pct": current["relative_humidity_2m"],
-            "condition": conditions.get(code, f"code {code}"),
+            "condition": _WEATHER_CODES.get(code, f"code {code}"),
             "wind_speed_kmh": current["wind_speed_10m"],
         }
     except Exception as e:
@@ -144,6 +170,7 @@ def get_weather(location):
     name="get_time",
     description="Get the current time and date",
     parameters=[],
+    summary="It's {time} on {date}.",
 )
 def get_time():
     now = datetime.now()
@@ -200,6 +227,7 @@ def set_timer(seconds, label="timer"):
     name="cancel_last_timer",
     description="Cancel the most recently set timer",
     parameters=[],
+    summary="Cancelled the {label} timer.",
 )
 def cancel_last_timer():
     for timer in reversed(_active_timers):
@@ -235,6 +263,8 @@ def cancel_all_timers():
     parameters=[
         {"name": "expression", "type": "string", "description": "Math expression to evaluate, e.g. '347 * 23'"},
     ],
+    cacheable=True,
+    summary="{expression} is {result}.",
 )
 def calculate(expression):
     # Only allow safe math characters
@@ -243,6 +273,11 @@ def calculate(expression):
         return {"error": "Invalid characters in expression"}
     try:
         result = eval(expression, {"__builtins__": {}}, {})
+        if isinstance(result, float):
+            # Hide binary rounding noise such as 0.30000000000000004
+            result = round(result, 6)
+            if result.is_integer() and abs(result) < 1e15:
+                result = int(result)
         return {"expression": expression, "result": result}
     except Exception as e:
         return {"error": str(e)}
@@ -280,6 +315,7 @@ def get_system_info():
     parameters=[
         {"name": "text", "type": "string", "description": "The note or reminder text"},
     ],
+    summary="Noted.",
 )
 def save_note(text):
     NOTES_DIR.mkdir(exist_ok=True)
@@ -388,6 +424,7 @@ def list_dev_queues():
     parameters=[
         {"name": "topic", "type": "string", "description": "Topic to look up"},
     ],
+    cacheable=True,
 )
 def wikipedia_summary(topic):
     try:
@@ -412,6 +449,7 @@ def wikipedia_summary(topic):
         {"name": "from_unit", "type": "string", "description": "Unit to convert from"},
         {"name": "to_unit", "type": "string", "description": "Unit to convert to"},
     ],
+    cacheable=True,
 )
 def convert_units(value, from_unit, to_unit):
     conversions = {
@@ -440,12 +478,17 @@ def convert_units(value, from_unit, to_unit):
 # --- Vision ---
 
 _camera = None
+# Thumbnail of the frame visual mode last described. Cleared whenever the
+# camera is opened or visual mode is turned on, so the next frame is
+# always described.
+_last_visual_frame = None
 
 
 def init_camera():
     """Open the webcam and warm it up. Call at startup."""
-    global _camera
+    global _camera, _last_visual_frame
     import cv2
+    _last_visual_frame = None
     _camera = cv2.VideoCapture(0)
     if not _camera.isOpened():
         logger.error("Could not open webcam")
@@ -787,10 +830,12 @@ def read_messages(contact, count=10):
     name="start_visual_mode",
     description="Start visual mode to periodically capture and describe what the camera sees. Use when user says 'start watching', 'watch this', 'look at this', etc.",
     parameters=[],
+    summary="I'm watching.",
 )
 def start_visual_mode():
-    global VISUAL_MODE
+    global VISUAL_MODE, _last_visual_frame
     VISUAL_MODE = True
+    _last_visual_frame = None
     return {"status": "visual_mode_enabled"}
 
 
@@ -798,6 +843,7 @@ def start_visual_mode():
     name="stop_visual_mode",
     description="Stop visual mode. Use when user says 'stop watching', 'stop looking', etc.",
     parameters=[],
+    summary="Stopped watching.",
 )
 def stop_visual_mode():
     global VISUAL_MODE
@@ -809,6 +855,7 @@ def stop_visual_mode():
     name="mute_microphone",
     description="Mute the microphone. Use when user says 'mute', 'mute mic', 'stop listening but keep watching', etc. Visual mode continues working.",
     parameters=[],
+    summary="Microphone muted.",
 )
 def mute_microphone():
     global MUTED
@@ -820,6 +867,7 @@ def mute_microphone():
     name="unmute_microphone",
     description="Unmute the microphone. Use when user says 'unmute', 'unmute mic', 'start listening again', etc.",
     parameters=[],
+    summary="Microphone unmuted.",
 )
 def unmute_microphone():
     global MUTED
@@ -831,6 +879,7 @@ def unmute_microphone():
     name="start_passive_mode",
     description="Start passive mode. Iris listens passively and only responds when addressed by name. Use when user says 'passive mode', 'just listen', 'listen in', etc.",
     parameters=[],
+    summary="Passive mode on. Say my name when you need me.",
 )
 def start_passive_mode():
     global PASSIVE_MODE
@@ -842,6 +891,7 @@ def start_passive_mode():
     name="stop_passive_mode",
     description="Stop passive mode and return to normal listening. Use when user says 'stop passive mode', 'normal mode', 'stop listening passively', etc.",
     parameters=[],
+    summary="Passive mode off.",
 )
 def stop_passive_mode():
     global PASSIVE_MODE
@@ -863,16 +913,43 @@ def append_dictation(text):
     _dictation_line_count += 1
 
 
+_PUNCT_TABLE = str.maketrans('', '', string.punctuation)
+
+
+def _collapse_repeats(lines, key=None):
+    """Drop lines that are empty or repeat the line kept before them.
+
+    Whisper often transcribes noise or a held sound as the same line over
+    and over; only the first copy is worth sending to Claude. Lines count
+    as repeats only if their words match ignoring case and punctuation, so
+    corrections like "on" to "off" are kept. key extracts the text to
+    compare, e.g. without a timestamp.
+    """
+    kept = []
+    last = None
+    for line in lines:
+        text = key(line) if key else line
+        words = text.casefold().translate(_PUNCT_TABLE).split()
+        if not words or words == last:
+            continue
+        kept.append(line)
+        last = words
+    return kept
+
+
 def get_dictation_context(max_lines=100):
     """Read the last N lines from the dictation file for the wake word prompt."""
     if _dictation_path is None or not _dictation_path.exists():
         return "(no transcript yet)"
     lines = _dictation_path.read_text().splitlines()
     total = len(lines)
-    recent = lines[-max_lines:]
+    window = lines[-max_lines:]
+    recent = _collapse_repeats(window, key=lambda line: line.partition("] ")[2])
     header = f"[Dictation transcript: {total} total lines, started {_dictation_start_time}]"
     if total > max_lines:
-        header += f"\n[...showing last {max_lines} of {total} lines...]"
+        header += f"\n[...showing the last {len(window)} of {total} lines...]"
+    if len(recent) < len(window):
+        header += f"\n[...{len(window) - len(recent)} repeated or empty lines removed...]"
     return header + "\n" + "\n".join(recent)
 
 
@@ -880,6 +957,7 @@ def get_dictation_context(max_lines=100):
     name="start_dictation",
     description="Start dictation mode. Speech is transcribed to a file on disk. Responds only when addressed by name. Use when user says 'start dictation', 'take notes', 'record this meeting', etc.",
     parameters=[],
+    summary="Dictation started.",
 )
 def start_dictation():
     global DICTATION_MODE, PASSIVE_MODE, _dictation_file, _dictation_path
@@ -899,6 +977,7 @@ def start_dictation():
     name="stop_dictation",
     description="Stop dictation mode and close the transcript file. Use when user says 'stop dictation', 'stop recording', 'end transcription', etc.",
     parameters=[],
+    summary="Dictation stopped after {lines} lines.",
 )
 def stop_dictation():
     global DICTATION_MODE, _dictation_file, _dictation_path
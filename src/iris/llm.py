@@ -1,11 +1,14 @@
+import atexit
 import json
 import logging
 import re
 import subprocess
+import threading
 import time
 from datetime import datetime
 
 
+from . import cache
 from . import functions
 
 logger = logging.getLogger(__name__)
@@ -13,6 +16,8 @@ logger = logging.getLogger(__name__)
 ASSISTANT_NAME = "Iris"
 EXTRA_SYSTEM_PROMPT = None
 MESSAGE_MODE = False
+SEMANTIC_CACHE = None  # cache.SemanticCache, enabled by --semantic-cache
+RESPONSE_CACHE = True  # exact-match cache in ~/.iris/cache.db, disabled by --no-cache
 
 IDENTITY = {
     "Iris": (
@@ -60,69 +65,423 @@ def get_system_prompt():
     return prompt
 
 
+def get_full_system_prompt():
+    """System prompt plus the function catalog, sent as Claude's system block."""
+    return get_system_prompt() + functions.get_prompt_description()
+
+
+_WS_RE = re.compile(r'\s+')
+# Prompts whose answer depends on the moment are never served from the
+# semantic cache.
+_TIME_SENSITIVE_RE = re.compile(
+    r"\b(time|date|day|today|tonight|tomorrow|yesterday|now|current|currently|"
+    r"latest|weather|forecast|temperature|news|timer|alarm|week|month|year)\b",
+    re.IGNORECASE,
+)
+# Nor are short prompts, or prompts that lean on the conversation so far
+# ("tell me another", "do it", "yes"): the same words mean something
+# different each time.
+SEMANTIC_MIN_WORDS = 3
+_CONTEXT_DEPENDENT_RE = re.compile(
+    r"\b(it|its|this|that|these|those|them|they|he|him|his|she|her|"
+    r"another|more|again|else|also|too|same|other|last|previous|"
+    r"yes|yeah|no|nope|ok|okay|sure)\b",
+    re.IGNORECASE,
+)
+
+
+def _semantic_cacheable(prompt):
+    """True if prompt means the same thing whenever it is asked."""
+    return (len(prompt.split()) >= SEMANTIC_MIN_WORDS
+            and not _TIME_SENSITIVE_RE.search(prompt)
+            and not _CONTEXT_DEPENDENT_RE.search(prompt))
+
+
+def _json_spans(text):
+    """Yield (start, end) for each balanced top-level {...} span in text.
+
+    Single left-to-right pass tracking brace depth, skipping braces that
+    appear inside JSON strings.
+    """
+    depth = 0
+    start = 0
+    in_string = False
+    escape = False
+    for i, c in enumerate(text):
+        if depth:
+            if in_string:
+                if escape:
+                    escape = False
+                elif c == "\\":
+                    escape = True
+                elif c == '"':
+                    in_string = False
+            elif c == '"':
+                in_string = True
+            elif c == "{":
+                depth += 1
+            elif c == "}":
+                depth -= 1
+                if not depth:
+                    yield start, i + 1
+        elif c == "{":
+            depth = 1
+            start = i
+
+
 def parse_response(response):
     """Split a response into spoken text and JSON data.
 
     Returns (speech_text, json_list) where json_list is a list of parsed
     function call objects (may be empty).
     """
-    # Match JSON objects (including nested) in the response
-    json_pattern = re.compile(r'(\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\})')
-    matches = json_pattern.findall(response)
-
     json_list = []
-    speech = response
-    for match in matches:
+    pieces = []
+    pos = 0
+    for start, end in _json_spans(response):
         try:
-            data = json.loads(match)
-            if "function" in data:
-                json_list.append(data)
-                speech = speech.replace(match, "", 1).strip()
+            data = json.loads(response[start:end])
         except json.JSONDecodeError:
             continue
+        if "function" in data:
+            json_list.append(data)
+            pieces.append(response[pos:start])
+            pos = end
+    pieces.append(response[pos:])
 
     # Clean up leftover whitespace and punctuation artifacts
-    speech = re.sub(r'\s+', ' ', speech).strip()
+    speech = _WS_RE.sub(' ', "".join(pieces)).strip()
     return speech, json_list
 
 
+class _Session:
+    """A long-lived claude process for one conversation.
+
+    The CLI is started once with the stream-json protocol; each prompt is
+    written to stdin as a user message and the reply is read back from stdout
+    until the turn's result event, so process startup is paid once per
+    conversation rather than once per turn. The system prompt is passed as a
+    system block rather than a user message so it forms a stable, cacheable
+    prefix for every turn.
+    """
+
+    def __init__(self, cwd=None):
+        self.cwd = cwd
+        self._lock = threading.Lock()
+        self._proc = subprocess.Popen(
+            ["claude", "-p",
+             "--input-format", "stream-json",
+             "--output-format", "stream-json",
+             "--verbose", "--include-partial-messages",
+             "--append-system-prompt", get_full_system_prompt(),
+             "--allowedTools", "Read"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+            start_new_session=True,
+            cwd=cwd,
+        )
+
+    def alive(self):
+        return self._proc.poll() is None
+
+    def check_started(self, timeout=1.0):
+        """Raise RuntimeError if claude exits within timeout seconds of starting."""
+        try:
+            self._proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return
+        raise RuntimeError(f"claude exited at startup (status {self._proc.returncode})")
+
+    def ask(self, prompt):
+        """Send a prompt and yield the response text as it streams in.
+
+        A turn that uses a tool streams several text blocks, e.g. "I'll take
+        a look." before a Read and the answer after it. They are separated by
+        a blank line so they don't run together.
+        """
+        message = {"type": "user", "message": {"role": "user", "content": prompt}}
+        with self._lock:
+            self._proc.stdin.write(json.dumps(message) + "\n")
+            self._proc.stdin.flush()
+            done = False
+            streamed = False
+            new_block = False
+            try:
+                for event in self._events():
+                    if event.get("type") == "stream_event":
+                        inner = event.get("event", {})
+                        if inner.get("type") in ("message_start", "content_block_start"):
+                            new_block = streamed
+                        delta = inner.get("delta", {})
+                        if delta.get("type") == "text_delta":
+                            if new_block:
+                                new_block = False
+                                yield "\n\n"
+                            streamed = True
+                            yield delta["text"]
+                    elif event.get("type") == "result":
+                        done = True
+                        if not streamed:
+                            yield event.get("result", "")
+                        return
+                raise RuntimeError("claude session exited unexpectedly")
+            finally:
+                # A caller that stops reading early must not leave the rest of
+                # this turn in the pipe for the next prompt to pick up.
+                if not done and self.alive():
+                    for event in self._events():
+                        if event.get("type") == "result":
+                            break
+
+    def _events(self):
+        for line in self._proc.stdout:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+    def close(self):
+        if self.alive():
+            self._proc.terminate()
+
+
+_sessions = {}  # cwd -> _Session
+_notes = {}  # cwd -> things Claude said without the session, sent with the next prompt
+_response_cache = None
+
+
+@atexit.register
+def _close_sessions():
+    for session in _sessions.values():
+        session.close()
+    _sessions.clear()
+
+
+_SENTENCE_END = re.compile(r'[.!?]+(?=\s)')
+
+
+class SentenceSplitter:
+    """Split streamed response text into sentences as they complete.
+
+    Text inside JSON function-call blocks is dropped so it is never spoken.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk):
+        """Add a chunk of streamed text; return any sentences it completes."""
+        speech = []
+        for c in chunk:
+            if self._depth:
+                if self._in_string:
+                    if self._escape:
+                        self._escape = False
+                    elif c == "\\":
+                        self._escape = True
+                    elif c == '"':
+                        self._in_string = False
+                elif c == '"':
+                    self._in_string = True
+                elif c == "{":
+                    self._depth += 1
+                elif c == "}":
+                    self._depth -= 1
+            elif c == "{":
+                self._depth = 1
+            else:
+                speech.append(c)
+        text = self._pending + "".join(speech)
+        sentences = []
+        last = 0
+        for m in _SENTENCE_END.finditer(text):
+            sentences.append(text[last:m.end()])
+            last = m.end()
+        self._pending = text[last:]
+        return [s for s in (" ".join(s.split()) for s in sentences) if s]
+
+    def flush(self):
+        """Return whatever text is left once the stream has ended."""
+        text = " ".join(self._pending.split())
+        self._pending = ""
+        return [text] if text else []
+
+
 def init_conversation(cwd=None):
-    """Start a new Claude conversation with the system prompt."""
+    """Start a new Claude conversation with the system prompt.
+
+    The greeting for a given system prompt is cached for a day, so a restart
+    only has to launch the session instead of waiting for Claude to reply.
+    A cached greeting is noted for the session so its history starts with it.
+    """
     logger.info("Starting new Claude conversation (cwd=%s)", cwd)
     intro = (
         "Introduce yourself briefly. You are watching through the camera and ready to read aloud, play a game, or narrate what you see."
         if functions.VISUAL_MODE else
         "Introduce yourself briefly."
     )
-    prompt = get_system_prompt() + functions.get_prompt_description() + "\n\n" + intro
+    old = _sessions.pop(cwd, None)
+    if old is not None:
+        old.close()
+    _notes.pop(cwd, None)
+    key = cache.cache_key("greeting", get_full_system_prompt(), intro)
+    try:
+        session = _Session(cwd=cwd)
+        response = _get_response_cache().get(key) if RESPONSE_CACHE else None
+        if response is None:
+            response = "".join(session.ask(intro)).strip()
+            if response and RESPONSE_CACHE:
+                _get_response_cache().put(key, response)
+        else:
+            logger.info("Using cached greeting")
+            session.check_started()
+            add_note(f"You introduced yourself with {json.dumps(response)}.", cwd)
+    except (OSError, RuntimeError) as e:
+        logger.warning("Persistent claude session unavailable (%s), using one-shot calls", e)
+        result = subprocess.run(
+            ["claude", "-p", "--append-system-prompt", get_full_system_prompt(), intro],
+            capture_output=True,
+            text=True,
+            start_new_session=True,
+            cwd=cwd,
+        )
+        return result.stdout.strip()
+    _sessions[cwd] = session
+    return response
+
+
+def add_note(text, cwd=None):
+    """Pass text to Claude along with the next prompt for cwd.
+
+    Replies served from a cache never reach the claude session, so without
+    a note its history would skip them.
+    """
+    _notes.setdefault(cwd, []).append(text)
+
+
+def _with_notes(prompt, cwd):
+    notes = _notes.pop(cwd, None)
+    if not notes:
+        return prompt
+    return "[Since your last reply: " + " ".join(notes) + "]\n\n" + prompt
+
+
+def stream_response(prompt, cwd=None):
+    """Yield Claude's response to prompt in chunks as they are generated.
+
+    Uses the persistent session for cwd when one is running, otherwise falls
+    back to a one-shot `claude -c -p` call that yields the whole response.
+    Any notes added for cwd are sent ahead of the prompt.
+    """
+    prompt = _with_notes(prompt, cwd)
+    session = _sessions.get(cwd)
+    if session is not None:
+        if session.alive():
+            yield from session.ask(prompt)
+            return
+        logger.warning("Claude session exited, using one-shot calls")
+        _sessions.pop(cwd, None)
+    # The system prompt isn't carried over by -c, so send it every time.
     result = subprocess.run(
-        ["claude", "-p", prompt],
+        ["claude", "-c", "-p", prompt, "--allowedTools", "Read",
+         "--append-system-prompt", get_full_system_prompt()],
         capture_output=True,
-        text=True,
         start_new_session=True,
+        text=True,
         cwd=cwd,
     )
-    return result.stdout.strip()
+    yield result.stdout
+
+
+def _get_response_cache():
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = cache.ResponseCache()
+    return _response_cache
 
 
 def generate_response(
     prompt,
-    temperature=0.9,
-    max_tokens=None,
     cwd=None,
+    cacheable=False,
+    semantic=False,
+    on_sentence=None,
 ):
+    """Return Claude's response to prompt.
+
+    With cacheable=True the response is looked up in (and stored to) the
+    exact-match response cache, keyed by the system prompt and prompt. Only
+    use it for prompts whose answer does not depend on the moment, such as
+    summaries of deterministic function results.
+
+    With semantic=True and SEMANTIC_CACHE enabled, a response given to a
+    near-duplicate earlier prompt is reused. Meant for raw user utterances,
+    not function follow-ups. Responses that call functions, and prompts that
+    are short, mention the time, date or weather, or refer back to the
+    conversation, are never cached this way.
+
+    A cached response is noted for the session so its history stays whole.
+
+    If on_sentence is given, it is called with each spoken sentence of the
+    response (function-call JSON removed) as soon as Claude has finished
+    generating it, so speech can start before the response is complete.
+    """
     start = time.time()
+    splitter = SentenceSplitter() if on_sentence else None
+
+    def _emit(text):
+        if splitter is not None:
+            for sentence in splitter.feed(text):
+                on_sentence(sentence)
+
+    def _finish():
+        if splitter is not None:
+            for sentence in splitter.flush():
+                on_sentence(sentence)
+
+    key = None
+    cached = None
+    if cacheable and RESPONSE_CACHE:
+        key = cache.cache_key(get_full_system_prompt(), prompt)
+        cached = _get_response_cache().get(key)
+        if cached is not None:
+            logger.info("Response cache hit")
+    semantic = semantic and SEMANTIC_CACHE is not None and _semantic_cacheable(prompt)
+    if semantic and cached is None:
+        cached = SEMANTIC_CACHE.get(prompt)
+        if cached is not None and parse_response(cached)[1]:
+            cached = None
+        if cached is not None:
+            logger.info("Semantic cache hit")
+    if cached is not None:
+        add_note(f"Asked {json.dumps(prompt)}, you replied (from cache) {json.dumps(cached)}.", cwd)
+        _emit(cached)
+        _finish()
+        return cached
 
     try:
         logger.info("Generating response... at %s", datetime.now())
-        result = subprocess.run(
-            ["claude", "-c", "-p", prompt, "--allowedTools", "Read"],
-            capture_output=True,
-            start_new_session=True,
-            text=True,
-            cwd=cwd,
-        )
-        return result.stdout.strip()
+        parts = []
+        for chunk in stream_response(prompt, cwd=cwd):
+            parts.append(chunk)
+            _emit(chunk)
+        _finish()
+        response = "".join(parts).strip()
+        if key is not None and response:
+            _get_response_cache().put(key, response)
+        if semantic and response and not parse_response(response)[1]:
+            SEMANTIC_CACHE.put(prompt, response)
+        return response
+    except (OSError, RuntimeError) as e:
+        logger.error("Claude session failed: %s", e)
+        _sessions.pop(cwd, None)
+        return ""
     except KeyboardInterrupt:
         logger.info("KeyboardInterrupt")
         return ""
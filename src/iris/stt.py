@@ -0,0 +1,214 @@
+"""Speech-to-text for captured microphone audio."""
+
+import collections
+import json
+import logging
+import os
+import threading
+
+import speech_recognition as sr
+
+logger = logging.getLogger(__name__)
+
+BACKEND = "faster-whisper"  # or "whispercpp"
+MODEL_SIZE = "base.en"
+WHISPERCPP_MODEL = "base.en-q5_1"  # ggml weights, 5-bit quantized
+SAMPLE_RATE = 16000
+
+WAKE_MODEL_LANG = "en-us"
+VAD_FRAME_MS = 30
+VAD_END_SILENCE_MS = 600  # trailing non-speech that ends a phrase
+VAD_MIN_SPEECH_MS = 300  # shorter bursts (clicks, taps) are ignored
+VAD_PRE_ROLL_MS = 300  # audio kept from just before speech starts
+
+_model = None
+_model_lock = threading.Lock()
+_wake_model = None
+_vad = None  # webrtcvad.Vad once enable_vad() has been called
+_scratch = threading.local()  # per-thread float32 buffer for Whisper input
+
+
+def _load_whispercpp():
+    global _model
+    with _model_lock:
+        if _model is None:
+            from pywhispercpp.model import Model
+            logger.info("Loading whisper.cpp model %s", WHISPERCPP_MODEL)
+            _model = Model(WHISPERCPP_MODEL, n_threads=os.cpu_count(),
+                           print_progress=False, print_realtime=False)
+        return _model
+
+
+def load_model():
+    """Load the Whisper model for BACKEND once and return it.
+
+    faster-whisper runs INT8 on CPU; whisper.cpp uses quantized ggml weights
+    and Metal where available.
+    """
+    global _model
+    if BACKEND == "whispercpp":
+        return _load_whispercpp()
+    with _model_lock:
+        if _model is None:
+            from faster_whisper import WhisperModel
+            logger.info("Loading faster-whisper model %s (int8)", MODEL_SIZE)
+            model = WhisperModel(MODEL_SIZE, device="cpu", compute_type="int8")
+            # Run one throwaway decode so the first real phrase doesn't pay
+            # for allocator and kernel warm-up. No VAD, or it would skip it.
+            import numpy as np
+            segments, _ = model.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32),
+                                           language="en", beam_size=1)
+            list(segments)
+            _model = model
+        return _model
+
+
+def _samples(audio_data):
+    import numpy as np
+    return np.frombuffer(audio_data.get_raw_data(convert_width=2), dtype=np.int16)
+
+
+def rms(audio_data):
+    """Root-mean-square level of an sr.AudioData, on the same scale as
+    Recognizer.energy_threshold."""
+    import numpy as np
+    samples = _samples(audio_data)
+    if not len(samples):
+        return 0.0
+    return float(np.sqrt(np.mean(samples.astype(np.float32) ** 2)))
+
+
+def voiced_frames(audio_data, threshold, frame_ms=VAD_FRAME_MS):
+    """Count the frame_ms frames of an sr.AudioData louder than threshold.
+
+    Levels are on the same scale as rms(), so a lone click or tap that lifts
+    a clip's overall level counts as only one or two frames.
+    """
+    import numpy as np
+    samples = _samples(audio_data)
+    size = audio_data.sample_rate * frame_ms // 1000
+    count = len(samples) // size
+    if not count:
+        return 0
+    frames = samples[:count * size].astype(np.float32).reshape(count, size)
+    levels = np.sqrt(np.mean(frames ** 2, axis=1))
+    return int(np.count_nonzero(levels > threshold))
+
+
+def _to_float32(pcm):
+    """Convert 16-bit PCM to Whisper's float32 input in a reused buffer.
+
+    The returned array is only valid until this thread's next call.
+    """
+    import numpy as np
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    buf = getattr(_scratch, "buf", None)
+    if buf is None or len(buf) < len(samples):
+        buf = _scratch.buf = np.empty(max(len(samples), 30 * SAMPLE_RATE), dtype=np.float32)
+    out = buf[:len(samples)]
+    np.multiply(samples, 1 / 32768.0, out=out)
+    return out
+
+
+def transcribe(audio_data):
+    """Transcribe an sr.AudioData to text.
+
+    Uses whisper.cpp if selected, else faster-whisper with INT8 weights.
+    """
+    samples = _to_float32(audio_data.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2))
+    model = load_model()
+    if BACKEND == "whispercpp":
+        return " ".join(seg.text.strip() for seg in model.transcribe(samples, language="en"))
+    segments, _ = model.transcribe(samples, language="en", beam_size=1, vad_filter=True,
+                                   condition_on_previous_text=False)
+    return " ".join(segment.text.strip() for segment in segments)
+
+
+def load_wake_model():
+    """Load the small Vosk model used for wake-word spotting.
+
+    Raises ImportError if vosk is not installed.
+    """
+    global _wake_model
+    if _wake_model is None:
+        from vosk import Model, SetLogLevel
+        SetLogLevel(-1)
+        logger.info("Loading Vosk model (%s) for wake-word spotting", WAKE_MODEL_LANG)
+        _wake_model = Model(lang=WAKE_MODEL_LANG)
+    return _wake_model
+
+
+def spot_words(audio_data, words):
+    """Listen for a small set of words in an sr.AudioData.
+
+    Runs Vosk with a grammar limited to words, which is far cheaper than a
+    full Whisper pass. Returns the words heard (possibly ""), or None if the
+    wake model isn't loaded or doesn't know one of the words.
+    """
+    if _wake_model is None:
+        return None
+    if any(_wake_model.find_word(w) < 0 for w in words):
+        return None
+    from vosk import KaldiRecognizer
+    grammar = json.dumps(list(words) + ["[unk]"])
+    rec = KaldiRecognizer(_wake_model, SAMPLE_RATE, grammar)
+    rec.AcceptWaveform(audio_data.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2))
+    text = json.loads(rec.FinalResult()).get("text", "")
+    return " ".join(w for w in text.split() if w != "[unk]")
+
+
+def enable_vad(aggressiveness=2):
+    """Use webrtcvad to end phrases in listen().
+
+    Raises ImportError if webrtcvad is not installed.
+    """
+    global _vad
+    import webrtcvad
+    _vad = webrtcvad.Vad(aggressiveness)
+
+
+def listen(r, source, timeout, phrase_limit):
+    """Capture one phrase from source, like r.listen().
+
+    With VAD enabled, the phrase ends after VAD_END_SILENCE_MS of frames
+    webrtcvad classifies as non-speech, rather than after r.pause_threshold
+    of audio below the energy threshold.
+    """
+    if _vad is None:
+        return r.listen(source, timeout=timeout, phrase_time_limit=phrase_limit)
+    frame_samples = source.SAMPLE_RATE * VAD_FRAME_MS // 1000
+    end_frames = VAD_END_SILENCE_MS // VAD_FRAME_MS
+    min_speech = VAD_MIN_SPEECH_MS // VAD_FRAME_MS
+    max_frames = phrase_limit * 1000 // VAD_FRAME_MS
+    wait_frames = timeout * 1000 // VAD_FRAME_MS
+    pre_roll = collections.deque(maxlen=VAD_PRE_ROLL_MS // VAD_FRAME_MS)
+    frames = []
+    waited = speech = silence = 0
+    while True:
+        frame = source.stream.read(frame_samples)
+        is_speech = _vad.is_speech(frame, source.SAMPLE_RATE)
+        if not frames:
+            if is_speech:
+                frames = list(pre_roll) + [frame]
+                speech, silence = 1, 0
+                continue
+            pre_roll.append(frame)
+            waited += 1
+            if waited >= wait_frames:
+                raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+            continue
+        frames.append(frame)
+        if is_speech:
+            speech += 1
+            silence = 0
+        else:
+            silence += 1
+        if len(frames) >= max_frames:
+            break
+        if silence >= end_frames:
+            if speech >= min_speech:
+                break
+            # Too little speech to be a phrase; go back to waiting.
+            pre_roll.clear()
+            frames = []
+    return sr.AudioData(b"".join(frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
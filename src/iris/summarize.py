@@ -9,7 +9,6 @@ Options:
     --debug            Show debug logging
     --verbose          Show verbose logging
     --chunk-size=<c>   Chunk size [default: 3500]
-    --tokens=<t>       Max tokens [default: 256]
 """
 from docopt import docopt
 import logging
@@ -44,7 +43,6 @@ def main(args=None):
         text = f.read()
 
     chunk_size = int(parsed_args["--chunk-size"])
-    max_tokens = int(parsed_args["--tokens"])
 
     doc = nlp(text)
     # Summarize the text
@@ -56,7 +54,7 @@ def main(args=None):
             + str(chunk)
             + "\nEND"
         )
-        print(llm.generate_response(prompt, max_tokens=max_tokens))
+        print(llm.generate_response(prompt))
     return 0
 
 
@@ -1,5 +1,6 @@
 import os
 import queue
+import threading
 
 from textual.app import App, ComposeResult
 from textual.containers import Vertical
@@ -82,6 +83,10 @@ class VoiceApp(App):
         self._worker_fn = worker_fn
         self._quiet = quiet
         self.input_queue = queue.Queue()
+        # Last values posted, so repeats don't wake the event loop
+        self._post_lock = threading.Lock()
+        self._last_display = None
+        self._last_status = None
 
     def compose(self) -> ComposeResult:
         yield Header()
@@ -137,11 +142,19 @@ class VoiceApp(App):
 
     def display_callback(self, user_text: str, response_text: str) -> None:
         """Thread-safe callback for the FSM to update the display."""
-        self.post_message(DisplayUpdate(user_text, response_text))
+        with self._post_lock:
+            if (user_text, response_text) == self._last_display:
+                return
+            self._last_display = (user_text, response_text)
+            self.post_message(DisplayUpdate(user_text, response_text))
 
     def status_callback(self, text: str) -> None:
         """Thread-safe callback to update the status bar."""
-        self.post_message(StatusUpdate(text))
+        with self._post_lock:
+            if text == self._last_status:
+                return
+            self._last_status = text
+            self.post_message(StatusUpdate(text))
 
     def sleep_callback(self, sleeping: bool) -> None:
         """Thread-safe callback to toggle sleep mode visuals."""
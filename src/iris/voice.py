@@ -1,22 +1,174 @@
-
+import importlib.util
+import logging
+import queue
 import subprocess
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 VOICE = "Moira (Enhanced)"
 RATE = 180
 PITCH = 50
 QUIET = False
+ENGINE = "say"
+
+# Speech engines, mapped to the module each one needs (None for say).
+ENGINES = {
+    "say": None,
+    "pyttsx3": "pyttsx3",
+    "avspeech": "AVFoundation",
+}
+
+_engine = None
+
+
+def engine_available(name):
+    """True if the named engine's Python package is installed."""
+    module = ENGINES[name]
+    return module is None or importlib.util.find_spec(module) is not None
+
+
+def _pyttsx3_engine():
+    """Create the pyttsx3 engine on first use, on the thread that speaks."""
+    global _engine
+    if _engine is None:
+        import pyttsx3
+        _engine = pyttsx3.init()
+        _engine.setProperty("rate", RATE)
+        if VOICE and VOICE.lower() != "none":
+            for v in _engine.getProperty("voices"):
+                if v.name == VOICE:
+                    _engine.setProperty("voice", v.id)
+                    break
+            else:
+                logger.warning("Voice %r not found, using the default", VOICE)
+    return _engine
+
+
+def _avspeech_engine():
+    """Create the AVSpeechSynthesizer and pick the voice on first use."""
+    global _engine
+    if _engine is None:
+        from AVFoundation import AVSpeechSynthesisVoice, AVSpeechSynthesizer
+        voice = None
+        if VOICE and VOICE.lower() != "none":
+            name = VOICE.replace("(Enhanced)", "").replace("(Premium)", "").strip()
+            matches = [v for v in AVSpeechSynthesisVoice.speechVoices() if v.name() == name]
+            if matches:
+                voice = max(matches, key=lambda v: v.quality())
+            else:
+                logger.warning("Voice %r not found, using the default", VOICE)
+        _engine = (AVSpeechSynthesizer.alloc().init(), voice)
+    return _engine
+
+
+def _avspeech(text):
+    from AVFoundation import AVSpeechUtterance
+    synth, voice = _avspeech_engine()
+    utterance = AVSpeechUtterance.speechUtteranceWithString_(text)
+    if voice is not None:
+        utterance.setVoice_(voice)
+    # AVSpeech rates run 0-1 with 0.5 the normal pace (about 180 wpm);
+    # pbas 50 is say's normal pitch.
+    utterance.setRate_(min(RATE / 360, 1.0))
+    utterance.setPitchMultiplier_(min(max(PITCH / 50, 0.5), 2.0))
+    synth.speakUtterance_(utterance)
+    # Poll rather than use a delegate: callbacks need a run loop this
+    # thread doesn't have.
+    time.sleep(0.05)
+    while synth.isSpeaking():
+        time.sleep(0.05)
+
+
+def _speak(text):
+    """Speak text with the configured engine, blocking until it finishes."""
+    if ENGINE == "pyttsx3":
+        engine = _pyttsx3_engine()
+        engine.say(text)
+        engine.runAndWait()
+        return
+    if ENGINE == "avspeech":
+        _avspeech(text)
+        return
+    try:
+        cmd = ["say"]
+        if VOICE and VOICE.lower() != "none":
+            cmd += ["-v", VOICE]
+        cmd += ["-r", str(RATE), "--", f"[[pbas {PITCH}]] " + text]
+        subprocess.run(cmd, start_new_session=True)
+    except KeyboardInterrupt:
+        pass
+
+
+class SpeechPlayer:
+    """Plays queued speech on a background thread.
+
+    Whatever has queued up while the previous utterance was playing is
+    spoken with a single engine call, so streamed sentences don't each pay
+    for starting `say`.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._idle = threading.Event()
+        self._idle.set()
+        self._thread = None
+        self._last_active = 0.0  # time.monotonic() when speech last played
+
+    def enqueue(self, text):
+        with self._lock:
+            self._pending += 1
+            self._idle.clear()
+            self._last_active = time.monotonic()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, daemon=True)
+                self._thread.start()
+        self._queue.put(text)
+
+    def wait_idle(self, timeout=None):
+        """Block until everything queued has been spoken."""
+        return self._idle.wait(timeout)
+
+    def active_since(self, t):
+        """True if speech was queued or playing at any point since monotonic time t."""
+        with self._lock:
+            return self._pending > 0 or self._last_active >= t
+
+    def _worker(self):
+        while True:
+            texts = [self._queue.get()]
+            while True:
+                try:
+                    texts.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                _speak(" ".join(texts))
+            except Exception:
+                logger.exception("Speech failed")
+            finally:
+                with self._lock:
+                    self._last_active = time.monotonic()
+                    self._pending -= len(texts)
+                    if self._pending == 0:
+                        self._idle.set()
+
+
+player = SpeechPlayer()
 
 
 def say(text):
+    """Print text and queue it to be spoken; returns without waiting."""
     if text:
         print(text)
         if QUIET:
             return
-        try:
-            cmd = ["say"]
-            if VOICE and VOICE.lower() != "none":
-                cmd += ["-v", VOICE]
-            cmd += ["-r", str(RATE), "--", f"[[pbas {PITCH}]] " + text]
-            subprocess.run(cmd, start_new_session=True)
-        except KeyboardInterrupt:
-            pass
+        player.enqueue(text)
+
+
+def wait():
+    """Wait until queued speech has finished playing."""
+    player.wait_idle()
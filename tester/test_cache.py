@@ -0,0 +1,111 @@
+"""Tests for the Claude response caches in iris.cache."""
+
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from iris import cache
+
+
+class TestResponseCache:
+    """Tests for the exact-match ResponseCache."""
+
+    def test_miss_then_hit(self):
+        """A stored response is returned for the same key."""
+        rc = cache.ResponseCache(path=None)
+        key = cache.cache_key("system", "what is 2 + 2")
+        assert rc.get(key) is None
+        rc.put(key, "Four.")
+        assert rc.get(key) == "Four."
+
+    def test_key_depends_on_every_part(self):
+        """Changing the system prompt changes the key."""
+        assert cache.cache_key("a", "prompt") != cache.cache_key("b", "prompt")
+        assert cache.cache_key("a", "b") != cache.cache_key("ab", "")
+
+    def test_persists_to_disk(self, tmp_path):
+        """A new cache over the same database sees earlier entries."""
+        db = tmp_path / "cache.db"
+        cache.ResponseCache(path=db).put("k", "stored")
+        assert cache.ResponseCache(path=db).get("k") == "stored"
+
+    def test_expired_entries_miss(self):
+        """Entries older than the TTL are not returned."""
+        rc = cache.ResponseCache(path=None, ttl=60)
+        with patch.object(cache.time, "time", return_value=1000.0):
+            rc.put("k", "old")
+        with patch.object(cache.time, "time", return_value=1061.0):
+            assert rc.get("k") is None
+        with patch.object(cache.time, "time", return_value=1059.0):
+            assert rc.get("k") == "old"
+
+
+class TestSemanticCache:
+    """Tests for SemanticCache using a deterministic stand-in encoder."""
+
+    def setup_method(self):
+        pytest.importorskip("numpy")
+
+    @staticmethod
+    def _encode(text):
+        """Bag-of-letters unit vector, enough to make paraphrases close."""
+        import numpy as np
+        vec = np.zeros(26, dtype=np.float32)
+        for c in text:
+            if "a" <= c <= "z":
+                vec[ord(c) - 97] += 1
+        return vec / (np.linalg.norm(vec) or 1)
+
+    def test_near_duplicate_hits(self):
+        """A slightly different phrasing returns the stored response."""
+        sc = cache.SemanticCache(self._encode, threshold=0.9, path=None)
+        sc.put("whats the weather", "Sunny.")
+        assert sc.get("what's the weather") == "Sunny."
+
+    def test_unrelated_prompt_misses(self):
+        """A dissimilar prompt falls below the threshold."""
+        sc = cache.SemanticCache(self._encode, threshold=0.9, path=None)
+        assert sc.get("anything") is None
+        sc.put("whats the weather", "Sunny.")
+        assert sc.get("play some jazz music") is None
+
+    def test_persists_to_disk(self, tmp_path):
+        """Entries saved by one cache are loaded by the next."""
+        sc = cache.SemanticCache(self._encode, path=tmp_path)
+        sc.put("hello iris", "Hi!")
+        sc.save()
+        assert cache.SemanticCache(self._encode, path=tmp_path).get("hello iris") == "Hi!"
+
+    def test_oldest_entries_evicted(self):
+        """Only the newest max_entries responses are kept."""
+        sc = cache.SemanticCache(self._encode, threshold=0.99, path=None, max_entries=2)
+        sc.put("alpha", "A")
+        sc.put("bravo", "B")
+        sc.put("xray", "X")
+        assert sc.get("alpha") is None
+        assert sc.get("bravo") == "B"
+        assert sc.get("xray") == "X"
+
+    def test_expired_entries_miss(self):
+        """An entry older than the ttl is not served."""
+        sc = cache.SemanticCache(self._encode, path=None, ttl=60)
+        sc.put("hello iris", "Hi!")
+        sc._times[0] -= 120
+        assert sc.get("hello iris") is None
+
+    def test_miss_then_put_embeds_once(self):
+        """put reuses the vector computed by the get that missed."""
+        calls = []
+
+        def encode(text):
+            calls.append(text)
+            return self._encode(text)
+
+        sc = cache.SemanticCache(encode, path=None)
+        assert sc.get("hello iris") is None
+        sc.put("hello iris", "Hi!")
+        assert calls == ["hello iris"]
@@ -0,0 +1,234 @@
+"""Tests for response handling in iris.llm."""
+
+import json
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+# Add the src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from iris import llm
+
+
+def _split(chunks):
+    splitter = llm.SentenceSplitter()
+    sentences = []
+    for chunk in chunks:
+        sentences += splitter.feed(chunk)
+    return sentences + splitter.flush()
+
+
+class TestSentenceSplitter:
+    """Tests for splitting streamed text into speakable sentences."""
+
+    def test_sentences_complete_across_chunks(self):
+        """A sentence is emitted once its terminator and a space arrive."""
+        splitter = llm.SentenceSplitter()
+        assert splitter.feed("Hello th") == []
+        assert splitter.feed("ere. How") == ["Hello there."]
+        assert splitter.flush() == ["How"]
+
+    def test_decimal_point_does_not_split(self):
+        """A period inside a number is not a sentence boundary."""
+        assert _split(["It is 3.5 degrees. ", "Nice!"]) == ["It is 3.5 degrees.", "Nice!"]
+
+    def test_function_json_is_not_spoken(self):
+        """JSON blocks, including nested ones, are dropped from speech."""
+        chunks = ['Let me check. {"function": "get_weather", ', '"args": {"location": "Boston"}} ', "One moment."]
+        assert _split(chunks) == ["Let me check.", "One moment."]
+
+    def test_braces_inside_json_strings(self):
+        """A brace inside a JSON string does not end the block early."""
+        chunks = ['{"function": "save_note", "args": {"text": "a } b"}}', "Saved."]
+        assert _split(chunks) == ["Saved."]
+
+
+class TestParseResponse:
+    """Tests for splitting a response into speech and function calls."""
+
+    def test_plain_speech(self):
+        """A response without JSON is returned as speech."""
+        assert llm.parse_response("Hello  there.\n") == ("Hello there.", [])
+
+    def test_single_call(self):
+        """A function block is parsed and removed from the speech."""
+        speech, calls = llm.parse_response('Checking. {"function": "get_time", "args": {}} Done.')
+        assert speech == "Checking. Done."
+        assert calls == [{"function": "get_time", "args": {}}]
+
+    def test_multiple_calls(self):
+        """Every function block in the response is returned, in order."""
+        response = '{"function": "a", "args": {}} and {"function": "b", "args": {"x": 1}}'
+        speech, calls = llm.parse_response(response)
+        assert speech == "and"
+        assert [c["function"] for c in calls] == ["a", "b"]
+
+    def test_deep_nesting_and_string_braces(self):
+        """Nesting deeper than one level and braces in strings are handled."""
+        response = 'Ok {"function": "f", "args": {"a": {"b": {"c": "}{"}}}}'
+        speech, calls = llm.parse_response(response)
+        assert speech == "Ok"
+        assert calls[0]["args"]["a"]["b"]["c"] == "}{"
+
+    def test_non_function_json_is_kept(self):
+        """JSON without a function key, and invalid JSON, stay in the speech."""
+        speech, calls = llm.parse_response('Use {"a": 1} or {not json}.')
+        assert speech == 'Use {"a": 1} or {not json}.'
+        assert calls == []
+
+
+class _DeadSession:
+    """Stand-in for a _Session whose claude process has exited."""
+
+    def alive(self):
+        return False
+
+
+class TestStreamResponse:
+    """Tests for falling back from the persistent session."""
+
+    def test_dead_session_falls_back_with_system_prompt(self, monkeypatch):
+        """A session that exited is dropped and the one-shot call keeps the system prompt."""
+        calls = []
+
+        def _run(cmd, **kwargs):
+            calls.append(cmd)
+            return subprocess.CompletedProcess(cmd, 0, stdout="Hi.", stderr="")
+
+        monkeypatch.setattr(llm.subprocess, "run", _run)
+        monkeypatch.setitem(llm._sessions, "/tmp/x", _DeadSession())
+        assert "".join(llm.stream_response("hello", cwd="/tmp/x")) == "Hi."
+        assert "/tmp/x" not in llm._sessions
+        assert "--append-system-prompt" in calls[0]
+
+
+class _BrokenStdin:
+    def write(self, data):
+        raise BrokenPipeError("claude exited")
+
+    def flush(self):
+        pass
+
+
+class _ExitedProcess:
+    """Stand-in for a claude process that exited after alive() was checked."""
+
+    stdin = _BrokenStdin()
+
+    def poll(self):
+        return None
+
+
+class _NullStdin:
+    def write(self, data):
+        pass
+
+    def flush(self):
+        pass
+
+
+class _StreamingProcess:
+    """Stand-in for a claude process that replies with the given events."""
+
+    def __init__(self, events):
+        self.stdin = _NullStdin()
+        self.stdout = iter(json.dumps(e) + "\n" for e in events)
+
+    def poll(self):
+        return None
+
+
+def _stream_event(inner):
+    return {"type": "stream_event", "event": inner}
+
+
+def _text(text):
+    return _stream_event({"type": "content_block_delta", "delta": {"type": "text_delta", "text": text}})
+
+
+class TestSessionAsk:
+    """Tests for reading a turn back from the persistent session."""
+
+    def test_text_blocks_around_tool_use_are_separated(self):
+        """Text before and after a tool call does not run together."""
+        session = llm._Session.__new__(llm._Session)
+        session._lock = threading.Lock()
+        session._proc = _StreamingProcess([
+            _stream_event({"type": "message_start"}),
+            _stream_event({"type": "content_block_start", "content_block": {"type": "text"}}),
+            _text("I'll take a look."),
+            _stream_event({"type": "content_block_start", "content_block": {"type": "tool_use"}}),
+            _stream_event({"type": "message_start"}),
+            _stream_event({"type": "content_block_start", "content_block": {"type": "text"}}),
+            _text("I see a desk."),
+            {"type": "result", "result": "I see a desk."},
+        ])
+        assert "".join(session.ask("what do you see")) == "I'll take a look.\n\nI see a desk."
+
+
+class TestGenerateResponse:
+    """Tests for error handling around the persistent session."""
+
+    def test_broken_pipe_drops_session(self, monkeypatch):
+        """A session whose stdin is closed is dropped instead of raising."""
+        session = llm._Session.__new__(llm._Session)
+        session.cwd = "/tmp/y"
+        session._lock = threading.Lock()
+        session._proc = _ExitedProcess()
+        monkeypatch.setitem(llm._sessions, "/tmp/y", session)
+        assert llm.generate_response("hello", cwd="/tmp/y") == ""
+        assert "/tmp/y" not in llm._sessions
+
+
+class _DictCache:
+    """Exact-match stand-in for cache.SemanticCache."""
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, prompt):
+        return self.entries.get(prompt)
+
+    def put(self, prompt, response):
+        self.entries[prompt] = response
+
+
+class TestSemanticCaching:
+    """Tests for what generate_response stores in and serves from the semantic cache."""
+
+    def _generate(self, monkeypatch, prompt, reply):
+        monkeypatch.setattr(llm, "stream_response", lambda p, cwd=None: iter([reply]))
+        return llm.generate_response(prompt, semantic=True)
+
+    def test_plain_reply_is_cached_and_noted(self, monkeypatch):
+        """A hit is served and noted for the session's next prompt."""
+        sc = _DictCache()
+        monkeypatch.setattr(llm, "SEMANTIC_CACHE", sc)
+        monkeypatch.setattr(llm, "_notes", {})
+        self._generate(monkeypatch, "tell me a joke", "Why did the owl...")
+        assert self._generate(monkeypatch, "tell me a joke", "unused") == "Why did the owl..."
+        assert "tell me a joke" in llm._with_notes("next", None)
+
+    def test_function_calls_not_cached(self, monkeypatch):
+        """A reply that calls a function is never stored."""
+        sc = _DictCache()
+        monkeypatch.setattr(llm, "SEMANTIC_CACHE", sc)
+        self._generate(monkeypatch, "mute", '{"function": "mute", "args": {}}')
+        assert sc.entries == {}
+
+    def test_time_sensitive_prompt_not_cached(self, monkeypatch):
+        """Prompts about the time or weather bypass the cache."""
+        sc = _DictCache()
+        sc.entries["what time is it"] = "It's noon."
+        monkeypatch.setattr(llm, "SEMANTIC_CACHE", sc)
+        assert self._generate(monkeypatch, "what time is it", "It's 3pm.") == "It's 3pm."
+
+    def test_context_dependent_prompts_not_cached(self, monkeypatch):
+        """Short prompts and ones that refer back to the conversation bypass the cache."""
+        sc = _DictCache()
+        monkeypatch.setattr(llm, "SEMANTIC_CACHE", sc)
+        for prompt in ("yes", "do it", "tell me another joke", "tell me more about that"):
+            sc.entries[prompt] = "Yesterday's reply."
+            assert self._generate(monkeypatch, prompt, "Fresh reply.") == "Fresh reply."
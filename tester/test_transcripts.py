@@ -0,0 +1,67 @@
+"""Tests for transcript cleanup in iris.functions."""
+
+import sys
+from pathlib import Path
+
+# Add the src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from iris import functions
+
+
+class TestCollapseRepeats:
+    """Tests for _collapse_repeats."""
+
+    def test_exact_repeats_dropped(self):
+        """Consecutive copies of a line are kept once."""
+        lines = ["hello there", "hello there", "hello there", "how are you"]
+        assert functions._collapse_repeats(lines) == ["hello there", "how are you"]
+
+    def test_empty_lines_dropped(self):
+        """Blank and whitespace-only lines are dropped."""
+        assert functions._collapse_repeats(["", "  ", "okay"]) == ["okay"]
+
+    def test_only_consecutive_repeats_dropped(self):
+        """A line repeated later, not straight after itself, is kept."""
+        lines = ["yes", "no", "yes"]
+        assert functions._collapse_repeats(lines) == lines
+
+    def test_case_and_punctuation_repeat_dropped(self):
+        """A repeat that differs only in case and punctuation is dropped."""
+        lines = ["We should ship it on Friday.", "we should ship it on friday"]
+        assert functions._collapse_repeats(lines) == lines[:1]
+
+    def test_on_off_kept(self):
+        """A correction from "on" to "off" is kept."""
+        lines = ["turn on the lights", "turn off the lights"]
+        assert functions._collapse_repeats(lines) == lines
+
+    def test_negation_kept(self):
+        """A line that negates the one before it is kept."""
+        lines = ["we should ship it on friday", "we should not ship it on friday"]
+        assert functions._collapse_repeats(lines) == lines
+
+    def test_number_change_kept(self):
+        """A line that changes a number is kept."""
+        lines = ["the meeting is at 3", "the meeting is at 4"]
+        assert functions._collapse_repeats(lines) == lines
+
+    def test_key_ignores_timestamps(self):
+        """key compares lines without their timestamps."""
+        lines = ["[10:00:01] thank you", "[10:00:04] thank you", "[10:00:09] bye"]
+        result = functions._collapse_repeats(lines, key=lambda l: l.partition("] ")[2])
+        assert result == ["[10:00:01] thank you", "[10:00:09] bye"]
+
+
+class TestDictationContext:
+    """Tests for get_dictation_context."""
+
+    def test_header_counts_removed_lines(self, tmp_path, monkeypatch):
+        """The header says how many lines were shown and how many were removed."""
+        path = tmp_path / "dictation.txt"
+        path.write_text("[10:00:01] hi\n[10:00:02] hello\n[10:00:03] hello\n[10:00:04] bye\n")
+        monkeypatch.setattr(functions, "_dictation_path", path)
+        context = functions.get_dictation_context(max_lines=3)
+        assert "showing the last 3 of 4 lines" in context
+        assert "1 repeated or empty lines removed" in context
+        assert context.endswith("[10:00:02] hello\n[10:00:04] bye")
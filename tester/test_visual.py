@@ -0,0 +1,48 @@
+"""Tests for visual mode captures in iris.computer."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add the src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from iris import computer, functions
+
+
+@pytest.fixture
+def described(monkeypatch):
+    """Stub the camera and Claude; return the list of frames described."""
+    calls = []
+    monkeypatch.setattr(functions, "VISUAL_MODE", True)
+    monkeypatch.setattr(functions, "_last_visual_frame", None)
+    monkeypatch.setattr(functions, "capture_image", lambda: {"path": "frame.png"})
+    monkeypatch.setattr(computer, "_frame_thumbnail",
+                        lambda path: np.zeros((32, 32), dtype="int16"))
+
+    def _generate(prompt, on_status=None, on_sentence=None):
+        calls.append(prompt)
+        return "A desk."
+
+    monkeypatch.setattr(computer, "_generate_with_timer", _generate)
+    return calls
+
+
+class TestVisualCapture:
+    """Tests for _visual_capture."""
+
+    def test_unchanged_scene_skipped(self, described):
+        """A frame like the last one described is not sent to Claude."""
+        computer._visual_capture(0.0)
+        computer._visual_capture(0.0)
+        assert len(described) == 1
+
+    def test_start_visual_mode_describes_next_frame(self, described):
+        """Turning visual mode on again describes the same scene again."""
+        computer._visual_capture(0.0)
+        functions.stop_visual_mode()
+        functions.start_visual_mode()
+        computer._visual_capture(0.0)
+        assert len(described) == 2
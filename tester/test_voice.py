@@ -0,0 +1,30 @@
+"""Tests for background speech playback in iris.voice."""
+
+import sys
+from pathlib import Path
+
+# Add the src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from iris import voice
+
+
+class TestSpeechPlayer:
+    """Tests for the background speech thread."""
+
+    def test_failed_speech_does_not_block_wait(self, monkeypatch):
+        """An engine error is logged and the player still goes idle."""
+        spoken = []
+
+        def _speak(text):
+            spoken.append(text)
+            if len(spoken) == 1:
+                raise RuntimeError("engine failed")
+
+        monkeypatch.setattr(voice, "_speak", _speak)
+        player = voice.SpeechPlayer()
+        player.enqueue("first")
+        assert player.wait_idle(timeout=5)
+        player.enqueue("second")
+        assert player.wait_idle(timeout=5)
+        assert spoken[-1] == "second"
@@ -0,0 +1,33 @@
+"""Tests for wake word matching in iris.computer."""
+
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the src directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from iris import computer, llm
+
+
+class TestIsWakeWord:
+    """Tests for is_wake_word."""
+
+    def test_name_and_near_misses(self):
+        """The assistant's name matches within one edit."""
+        with patch.object(llm, "ASSISTANT_NAME", "Iris"):
+            assert computer.is_wake_word("hey iris what time is it")
+            assert computer.is_wake_word("irus")
+            assert computer.is_wake_word("iirs are you there")
+            assert not computer.is_wake_word("the virus spread")
+
+    def test_wake_up(self):
+        """'wake' and 'up' together wake the assistant."""
+        assert computer.is_wake_word("time to wake up")
+        assert not computer.is_wake_word("wake me later")
+
+    def test_other_name(self):
+        """A custom assistant name is used."""
+        with patch.object(llm, "ASSISTANT_NAME", "Bob"):
+            assert computer.is_wake_word("hi bob")
+            assert not computer.is_wake_word("hi iris")